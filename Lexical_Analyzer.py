@@ -1,33 +1,7 @@
-import re
 import os
-from enum import Enum
-from colorama import init, Fore, Back, Style
-from tabulate import tabulate
-
-# Initialize colorama
-init(autoreset=True)
-
-class TokenType(Enum):
-    KEYWORD = "Keyword"
-    IDENTIFIER = "Identifier"
-    OPERATOR = "Operator"
-    LITERAL = "Literal"
-    PUNCTUATION = "Punctuation"
-    SPECIAL_CHAR = "Special Character"
-    CONSTANT = "Constant"
-    ERROR = "Error"
-
-# Color mapping for token types
-TOKEN_COLORS = {
-    TokenType.KEYWORD: Fore.GREEN,
-    TokenType.IDENTIFIER: Fore.CYAN,
-    TokenType.OPERATOR: Fore.MAGENTA,
-    TokenType.LITERAL: Fore.YELLOW,
-    TokenType.PUNCTUATION: Fore.BLUE,
-    TokenType.SPECIAL_CHAR: Fore.WHITE,
-    TokenType.CONSTANT: Fore.LIGHTYELLOW_EX,
-    TokenType.ERROR: Fore.RED
-}
+from lex_core import (TokenType, Token, TokenView, ShiftedArray, TokenStore, HeavyHitters, LexStats,
+                      LexicalAnalyzer, MMAP_THRESHOLD, load_source_mapped)
+from lex_ui import Fore, Style, TOKEN_COLORS, clear_screen, print_header
 
 def token_test_menu(analyzer):
     """Menu for testing specific token types"""
@@ -58,17 +32,6 @@ def token_test_menu(analyzer):
         
         input(Fore.YELLOW + "\nPress Enter to continue...")
 
-def clear_screen():
-    """Clear the console screen"""
-    os.system('cls' if os.name == 'nt' else 'clear')
-
-def print_header(title, color=Fore.CYAN):
-    """Print a simple header"""
-    print(color + Style.BRIGHT + f"\n{'=' * 50}")
-    print(f"{title.upper()}".center(50))
-    print(f"{'=' * 50}\n")
-
-
 def test_token_type(analyzer, token_type):
     """Test if input text matches specified token type"""
     clear_screen()
@@ -100,249 +63,7 @@ def test_token_type(analyzer, token_type):
             print(Fore.WHITE + ", ".join(analyzer.special_chars))
         elif token_type == TokenType.CONSTANT:
             print(Fore.WHITE + ", ".join(analyzer.constants))
-            
-class Token:
-    def __init__(self, token_type, value, line_number):
-        self.type = token_type
-        self.value = value
-        self.line_number = line_number
-    
-    def __str__(self):
-        color = TOKEN_COLORS.get(self.type, Fore.WHITE)
-        return f"{color}{self.type.value}: {self.value} (Line {Style.BRIGHT}{self.line_number}{Style.NORMAL})"
-    
-    def to_row(self):
-        color = TOKEN_COLORS.get(self.type, Fore.WHITE)
-        return [
-            color + self.type.value,
-            color + self.value,
-            Style.BRIGHT + str(self.line_number)
-        ]
 
-class LexicalAnalyzer:
-    def __init__(self):
-        # Extended keyword list including common I/O functions
-        self.keywords = {
-            'int', 'float', 'double', 'char', 'void', 'bool', 'true', 'false',
-            'if', 'else', 'while', 'for', 'do', 'switch', 'case', 'default',
-            'break', 'continue', 'return', 'class', 'struct', 'new', 'delete',
-            'public', 'private', 'protected', 'static', 'const', 'virtual',
-            'try', 'catch', 'throw', 'namespace', 'using', 'include', 'define',
-            'auto', 'enum', 'extern', 'goto', 'register', 'sizeof', 'typedef',
-            'union', 'volatile', 'and', 'or', 'not', 'xor', 'bitand', 'bitor',
-            'compl', 'and_eq', 'or_eq', 'not_eq', 'xor_eq', 'cout', 'cin',
-            'printf', 'scanf', 'endl'
-        }
-        
-        # Standard C/C++ operators
-        self.operators = {
-            '+', '-', '*', '/', '%', '=', '!', '&', '|', '^', '~', '<', '>',
-            '==', '!=', '<=', '>=', '&&', '||', '++', '--', '+=', '-=', '*=',
-            '/=', '%=', '&=', '|=', '^=', '<<', '>>', '<<=', '>>=', '->', '::',
-            '.*', '->*'
-        }
-        
-        # Punctuation marks
-        self.punctuations = {
-            '{', '}', '[', ']', '(', ')', ',', ';', ':', '.', '?', '#'
-        }
-        
-        # Special characters (not operators or punctuation)
-        self.special_chars = {
-            '@', '$', '`', '\\'
-        }
-        
-        # Predefined constants
-        self.constants = {
-            'NULL', 'nullptr', 'EOF', 'TRUE', 'FALSE', 'MAX_PATH', 'PI'
-        }
-        
-        self.tokens = []
-        self.errors = []
-        
-        # Regular expression patterns (ordered by priority)
-        self.patterns = [
-            # Comments (to be ignored)
-            (None, r'//.*|/\*.*?\*/'),
-            
-            # String literals (including escape sequences)
-            (TokenType.LITERAL, r'"(?:\\.|[^"\\])*"'),
-            
-            # Character literals
-            (TokenType.LITERAL, r"'(?:\\.|[^'\\])'"),
-            
-            # Numeric literals (integers, floats, scientific notation)
-            (TokenType.LITERAL, r'-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?[fFuUlL]*'),
-            
-            # Constants (predefined)
-            (TokenType.CONSTANT, r'\b(?:' + '|'.join(re.escape(c) for c in self.constants) + r')\b'),
-            
-            # Keywords
-            (TokenType.KEYWORD, r'\b(?:' + '|'.join(re.escape(kw) for kw in self.keywords) + r')\b'),
-            
-            # Operators (longest first to ensure proper matching)
-            (TokenType.OPERATOR, r'<<=|>>=|->\*|\+\+|--|<<|>>|<=|>=|==|!=|&&|\|\||\+=|-=|\*=|/=|%=|&=|\|=|\^=|::|->|\+\+|\-\-|\+|\-|\*|/|%|=|!|&|\||\^|~|<|>|\?|:|\.[*]'),
-            
-            # Punctuations
-            (TokenType.PUNCTUATION, r'[{}[\]();,:.#]'),
-            
-            # Special characters
-            (TokenType.SPECIAL_CHAR, r'[@$`\\]'),
-            
-            # Identifiers (must start with letter/underscore, can contain numbers)
-            (TokenType.IDENTIFIER, r'[a-zA-Z_]\w*')
-        ]
-        
-    def is_token_of_type(self, text, token_type):
-        """Check if text matches a specific token type pattern"""
-        if token_type == TokenType.KEYWORD:
-            return text in self.keywords
-        elif token_type == TokenType.IDENTIFIER:
-            return bool(re.fullmatch(r'[a-zA-Z_]\w*', text))
-        elif token_type == TokenType.OPERATOR:
-            return text in self.operators
-        elif token_type == TokenType.LITERAL:
-            return (bool(re.fullmatch(r'".*"', text)) or  # String literal
-                   bool(re.fullmatch(r"'.'", text)) or    # Char literal
-                   bool(re.fullmatch(r'-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?[fFuUlL]*', text)))  # Numeric
-        elif token_type == TokenType.PUNCTUATION:
-            return text in self.punctuations
-        elif token_type == TokenType.SPECIAL_CHAR:
-            return text in self.special_chars
-        elif token_type == TokenType.CONSTANT:
-            return text in self.constants
-        return False
-        
-    def analyze(self, code):
-        self.tokens = []
-        self.errors = []
-        
-        lines = code.split('\n')
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-            if not line:
-                continue
-                
-            while line:
-                matched = False
-                
-                # First check for patterns to ignore (like comments)
-                ignore_pattern = r'//.*|/\*.*?\*/'
-                ignore_match = re.match(ignore_pattern, line)
-                if ignore_match:
-                    line = line[len(ignore_match.group(0)):].lstrip()
-                    continue
-                
-                for token_type, pattern in self.patterns:
-                    if token_type is None:  # Skip ignore patterns
-                        continue
-                        
-                    match = re.match(pattern, line)
-                    if match:
-                        value = match.group(0)
-                        self.tokens.append(Token(token_type, value, line_num))
-                        line = line[len(value):].lstrip()
-                        matched = True
-                        break
-                
-                if not matched:
-                    if line[0].isspace():
-                        line = line[1:]
-                    else:
-                        # Find the next whitespace or known symbol
-                        next_space = len(line)
-                        for symbol in self.operators.union(self.punctuations).union(self.special_chars):
-                            idx = line.find(symbol)
-                            if 0 < idx < next_space:
-                                next_space = idx
-                        
-                        if next_space == len(line):
-                            invalid_token = line
-                            line = ""
-                        else:
-                            invalid_token = line[:next_space]
-                            line = line[next_space:]
-                        
-                        if invalid_token:
-                            self.errors.append(Token(TokenType.ERROR, invalid_token, line_num))
-    
-    def get_tokens_by_type(self, token_type):
-        return [token for token in self.tokens if token.type == token_type]
-    
-    def get_token_counts(self):
-        counts = {}
-        for token_type in TokenType:
-            if token_type != TokenType.ERROR:
-                counts[token_type.value] = len(self.get_tokens_by_type(token_type))
-        counts["Total"] = len(self.tokens)
-        return counts
-    
-    def save_tokens_to_file(self, filename="Token.txt"):
-        with open(filename, 'w') as f:
-            # Write token counts first
-            counts = self.get_token_counts()
-            f.write("TOKEN COUNTS:\n")
-            for token_type, count in counts.items():
-                f.write(f"{token_type}: {count}\n")
-            
-            # Write all tokens
-            f.write("\nALL TOKENS:\n")
-            for token in self.tokens:
-                f.write(f"{token.type.value}: {token.value} (Line {token.line_number})\n")
-    
-    def save_errors_to_file(self, filename="Error.txt"):
-        with open(filename, 'w') as f:
-            f.write(f"Total Errors: {len(self.errors)}\n\n")
-            for error in self.errors:
-                f.write(f"Error: {error.value} (Line {error.line_number})\n")
-    
-    def display_tokens_table(self, tokens=None):
-        clear_screen()
-        if tokens is None:
-            tokens = self.tokens
-        
-        print_header("Token Analysis Results")
-        
-        if not tokens:
-            print(Fore.YELLOW + "No tokens to display.")
-            return
-        
-        # Display token counts
-        counts = self.get_token_counts()
-        print(Fore.CYAN + Style.BRIGHT + "\nTOKEN COUNTS:")
-        for token_type, count in counts.items():
-            if token_type == "Total":
-                print(Fore.WHITE + f"{token_type}: {Fore.CYAN}{count}")
-            else:
-                color = next((v for k, v in TOKEN_COLORS.items() if k.value == token_type), Fore.WHITE)
-                print(f"{color}{token_type}: {Fore.WHITE}{count}")
-        
-        # Display token details
-        print(Fore.CYAN + Style.BRIGHT + "\nTOKEN DETAILS:")
-        headers = [Fore.WHITE + Style.BRIGHT + "Type", 
-                  Fore.WHITE + Style.BRIGHT + "Value", 
-                  Fore.WHITE + Style.BRIGHT + "Line"]
-        
-        rows = [token.to_row() for token in tokens]
-        print(tabulate(rows, headers=headers, tablefmt="grid"))
-    
-    def display_errors_table(self):
-        clear_screen()
-        print_header("Error Analysis")
-        
-        if not self.errors:
-            print(Fore.GREEN + "No errors found!")
-            return
-        
-        print(Fore.RED + Style.BRIGHT + f"Total Errors: {len(self.errors)}\n")
-        
-        headers = [Fore.RED + Style.BRIGHT + "Error Type", 
-                  Fore.RED + Style.BRIGHT + "Invalid Token", 
-                  Fore.RED + Style.BRIGHT + "Line"]
-        
-        rows = [error.to_row() for error in self.errors]
-        print(tabulate(rows, headers=headers, tablefmt="grid"))
-        
 def display_menu():
     clear_screen()
     print_header("Lexical Analyzer Menu")
@@ -456,8 +177,11 @@ def main():
                 print_header("Load From File")
                 filename = input(Fore.YELLOW + "\nEnter filename: " + Fore.WHITE).strip()
                 try:
-                    with open(filename, 'r') as f:
-                        source_code = f.read()
+                    if os.path.getsize(filename) >= MMAP_THRESHOLD:
+                        source_code = load_source_mapped(filename)
+                    else:
+                        with open(filename, 'r') as f:
+                            source_code = f.read()
                     clear_screen()
                     print(Fore.GREEN + f"Code loaded successfully from {filename}!")
                     input(Fore.YELLOW + "\nPress Enter to continue...")
@@ -539,9 +263,8 @@ if __name__ == "__main__":
     # Check for required packages
     try:
         from colorama import init, Fore, Back, Style
-        from tabulate import tabulate
         main()
     except ImportError:
         print("Required packages not found. Please install:")
-        print("pip install colorama tabulate")
+        print("pip install colorama")
         input("Press Enter to exit...")
\ No newline at end of file
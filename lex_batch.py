@@ -0,0 +1,179 @@
+"""Non-interactive batch mode: lex whole source trees across a process pool.
+
+    python lex_batch.py src/ include/ --include "*.cpp" "*.h" --exclude "*/third_party/*" --workers 8
+
+Each worker process keeps one LexicalAnalyzer and sends back only per-type
+counts and error positions, which the parent aggregates into
+get_token_counts()-style totals.
+"""
+import argparse
+import fnmatch
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from lex_core import LexicalAnalyzer, TokenStore, TokenType
+from lex_cache import LexCache
+
+DEFAULT_INCLUDE = ("*.c", "*.h", "*.cc", "*.cpp", "*.cxx", "*.hpp", "*.hh", "*.hxx")
+
+# Per-process analyzer and optional result cache, created once by _init_worker
+_analyzer = None
+_cache = None
+
+
+def iter_source_files(roots, include=DEFAULT_INCLUDE, exclude=()):
+    """Yield files under roots whose name or path matches include and not exclude"""
+    def matches(path, patterns):
+        name = os.path.basename(path)
+        return any(fnmatch.fnmatch(path, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+    for root in roots:
+        if os.path.isfile(root):
+            yield root
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames
+                                 if not matches(os.path.join(dirpath, d), exclude))
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                if matches(path, include) and not matches(path, exclude):
+                    yield path
+
+
+def _init_worker(options, cache_dir=None, cache_size=None):
+    global _analyzer, _cache
+    _analyzer = LexicalAnalyzer(**options)
+    if cache_dir:
+        _cache = LexCache(cache_dir, cache_size) if cache_size else LexCache(cache_dir)
+
+
+def _lex_file(path):
+    """Lex one file in a worker and return a compact result tuple.
+
+    (path, counts, errors, failure, cached): counts has one entry per
+    TokenStore type code, errors is a list of (value, line, column), failure
+    is an error message if the file could not be read and cached tells
+    whether the result came from the cache.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            code = f.read()
+    except OSError as e:
+        return path, None, [], str(e), False
+    if _cache is not None:
+        cached = _cache.analyze(_analyzer, code)
+    else:
+        _analyzer.analyze(code)
+        cached = False
+    counts = tuple(len(positions) for positions in _analyzer.tokens.positions)
+    errors = [(value, line, column) for token_type, value, line, column, offset in _analyzer.errors.rows()]
+    return path, counts, errors, None, cached
+
+
+class BatchReport:
+    """Aggregate statistics over a batch run"""
+    def __init__(self):
+        self.files = 0
+        self.failed = {}
+        self.type_counts = [0] * len(TokenStore.TYPES)
+        self.errors = {}  # path -> [(value, line, column)]
+        self.cache_hits = 0
+
+    def add(self, result):
+        path, counts, errors, failure, cached = result
+        if failure is not None:
+            self.failed[path] = failure
+            return
+        self.files += 1
+        self.cache_hits += cached
+        for code, count in enumerate(counts):
+            self.type_counts[code] += count
+        if errors:
+            self.errors[path] = errors
+
+    def get_token_counts(self):
+        counts = {}
+        for code, token_type in enumerate(TokenStore.TYPES):
+            if token_type != TokenType.ERROR:
+                counts[token_type.value] = self.type_counts[code]
+        counts["Total"] = sum(counts.values())
+        return counts
+
+    @property
+    def error_count(self):
+        return sum(len(errors) for errors in self.errors.values())
+
+    def to_dict(self):
+        return {
+            "files": self.files,
+            "cache_hits": self.cache_hits,
+            "token_counts": self.get_token_counts(),
+            "error_count": self.error_count,
+            "errors": {path: [list(error) for error in errors] for path, errors in self.errors.items()},
+            "failed": self.failed,
+        }
+
+
+def lex_tree(roots, include=DEFAULT_INCLUDE, exclude=(), workers=None, chunksize=16,
+             analyzer_options=None, cache_dir=None, cache_size=None):
+    """Yield a compact result per file (see _lex_file), fanned out over worker processes.
+
+    workers=1 lexes in this process, which is handy for debugging. With
+    cache_dir, unchanged files are served from a LexCache.
+    """
+    paths = iter_source_files(roots, include, exclude)
+    initargs = (analyzer_options or {}, cache_dir, cache_size)
+    if workers == 1:
+        _init_worker(*initargs)
+        yield from map(_lex_file, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=initargs) as executor:
+        yield from executor.map(_lex_file, paths, chunksize=chunksize)
+
+
+def run_batch(roots, **kwargs):
+    report = BatchReport()
+    for result in lex_tree(roots, **kwargs):
+        report.add(result)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lex source trees in parallel")
+    parser.add_argument("roots", nargs="+", help="files or directories to lex")
+    parser.add_argument("--include", nargs="+", default=list(DEFAULT_INCLUDE),
+                        help="glob patterns of files to lex")
+    parser.add_argument("--exclude", nargs="+", default=[], help="glob patterns to skip")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunksize", type=int, default=16, help="files handed to a worker at a time")
+    parser.add_argument("--engine", choices=LexicalAnalyzer.ENGINES, default="sequential")
+    parser.add_argument("--cache-dir", help="reuse results for unchanged files from this directory")
+    parser.add_argument("--cache-size", type=int, help="cache size limit in bytes")
+    parser.add_argument("--json", metavar="FILE", help="write the full report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run_batch(args.roots, include=args.include, exclude=args.exclude,
+                       workers=args.workers, chunksize=args.chunksize,
+                       analyzer_options={"engine": args.engine},
+                       cache_dir=args.cache_dir, cache_size=args.cache_size)
+
+    print(f"Files lexed: {report.files}")
+    if args.cache_dir:
+        print(f"Cache hits: {report.cache_hits}")
+    for token_type, count in report.get_token_counts().items():
+        print(f"{token_type}: {count}")
+    print(f"Errors: {report.error_count} in {len(report.errors)} files")
+    for path, failure in report.failed.items():
+        print(f"Failed: {path}: {failure}", file=sys.stderr)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report.to_dict(), f, indent=2)
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""Benchmarks for the analyzer over a seeded synthetic C/C++ corpus.
+
+    python lex_bench.py --size 4000000 --seed 1 --json bench.json
+    python lex_bench.py --file big.cpp --configs '{"engine": "master", "classify": "lookup"}'
+
+generate_corpus() builds reproducible source with tunable file size, line
+length, comment density, string-literal density and error rate. Each
+analyzer configuration is benchmarked in a fresh process so its peak RSS is
+its own. The JSON report includes the corpus parameters and the current git
+commit, which makes runs comparable across commits and scanner engines.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from lex_core import LexicalAnalyzer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PHASES = ("analyze", "analyze_stats", "get_token_counts", "save_tokens_to_file", "display_tokens_table")
+
+TYPES = ("int", "float", "double", "char", "bool", "long", "unsigned")
+NAMES = ("count", "total", "index", "buffer", "value", "result", "node", "size",
+         "left", "right", "data", "next", "prev", "offset", "flags", "key")
+OPERATORS = ("+", "-", "*", "/", "%", "==", "!=", "<", ">", "<=", ">=", "&&", "||", "&", "|", "^", "<<", ">>")
+WORDS = ("fast", "path", "check", "the", "buffer", "before", "use", "todo", "fix", "bounds", "edge", "case")
+
+
+def generate_corpus(size=1000000, seed=0, line_length=60, comment_density=0.1,
+                    string_density=0.1, error_rate=0.01):
+    """Return about size characters of C-like source, the same for the same arguments.
+
+    line_length is the target statement length, comment_density the share of
+    lines that carry a // or /* */ comment, string_density the chance that a
+    literal is a string or char literal, and error_rate the chance that an
+    operand is replaced by an unterminated string or a bad char literal.
+    """
+    rng = random.Random(seed)
+    lines = []
+    written = 0
+    depth = 0
+
+    def name():
+        word = rng.choice(NAMES)
+        return word + str(rng.randrange(100)) if rng.random() < 0.3 else word
+
+    def literal():
+        if rng.random() < string_density:
+            if rng.random() < 0.2:
+                return "'" + rng.choice("abcxyz") + "'"
+            return '"' + " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))) + '"'
+        if rng.random() < 0.3:
+            return f"{rng.uniform(0, 1000):.3f}"
+        return str(rng.randrange(10000))
+
+    def operand():
+        if rng.random() < error_rate:
+            # Unterminated strings and multi-character char literals are errors
+            return '"' + rng.choice(WORDS) if rng.random() < 0.5 else "'" + name()[:2] + "'"
+        return literal() if rng.random() < 0.4 else name()
+
+    def expression():
+        parts = [operand()]
+        while len(" ".join(parts)) < line_length - 20:
+            parts.append(rng.choice(OPERATORS))
+            parts.append(operand())
+        return " ".join(parts)
+
+    def comment():
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 8)))
+        return f"/* {text} */" if rng.random() < 0.3 else f"// {text}"
+
+    while written < size:
+        roll = rng.random()
+        if depth == 0:
+            statement = f"{rng.choice(TYPES)} {name()}({rng.choice(TYPES)} {name()}) {{"
+        elif roll < 0.16 and depth < 6:
+            statement = rng.choice(("if", "while")) + f" ({expression()}) {{"
+        elif roll < 0.24:
+            statement = "}"
+        elif roll < 0.45:
+            statement = f"{rng.choice(TYPES)} {name()} = {expression()};"
+        elif roll < 0.55:
+            statement = f"return {expression()};"
+        else:
+            statement = f"{name()} = {expression()};"
+        line = "    " * (depth - 1 if statement == "}" else depth) + statement
+        if statement.endswith("{"):
+            depth += 1
+        elif statement == "}":
+            depth -= 1
+        if rng.random() < comment_density:
+            line += " " + comment()
+        lines.append(line)
+        written += len(line) + 1
+    lines.extend("    " * level + "}" for level in range(depth - 1, -1, -1))
+    return "\n".join(lines) + "\n"
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Send stdout, including the clear_screen() subprocess, to the null device"""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, 'w') as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            with contextlib.redirect_stdout(devnull):
+                yield
+        finally:
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+def _peak_rss():
+    """Peak resident set size of this process in bytes, or None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # kilobytes on Linux
+
+
+def _time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"best": min(times), "mean": sum(times) / len(times)}
+
+
+def bench_config(config, code, repeat=3, phases=PHASES):
+    """Time each phase for one analyzer configuration and measure its memory use"""
+    analyzer = LexicalAnalyzer(**config)
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        actions = {
+            "analyze": lambda: analyzer.analyze(code),
+            "analyze_stats": lambda: analyzer.analyze_stats(code),
+            "get_token_counts": analyzer.get_token_counts,
+            "save_tokens_to_file": lambda: analyzer.save_tokens_to_file(os.path.join(tmp, "Token.txt")),
+            "display_tokens_table": analyzer.display_tokens_table,
+        }
+        analyzer.analyze(code)  # warm up; later phases need the tokens
+        for phase in phases:
+            if phase == "display_tokens_table":
+                with _quiet():
+                    timings[phase] = _time(actions[phase], repeat)
+            else:
+                timings[phase] = _time(actions[phase], repeat)
+
+    # Allocation tracing slows everything down, so it gets its own pass
+    tracemalloc.start()
+    analyzer.analyze(code)
+    alloc_current, alloc_peak = tracemalloc.get_traced_memory()
+    # Blocks still allocated once analyze() returns, not every allocation made
+    retained_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+
+    tokens = len(analyzer.tokens) + len(analyzer.errors)
+    size = len(code.encode('utf-8')) if isinstance(code, str) else len(code)
+    result = {
+        "config": config,
+        "tokens": len(analyzer.tokens),
+        "errors": len(analyzer.errors),
+        "timings": timings,
+        "peak_rss_bytes": _peak_rss(),
+        "alloc_peak_bytes": alloc_peak,
+        "alloc_retained_bytes": alloc_current,
+        "alloc_retained_blocks": retained_blocks,
+        "token_store_bytes": analyzer.tokens.nbytes() + analyzer.errors.nbytes(),
+    }
+    if "analyze" in timings:
+        seconds = timings["analyze"]["best"]
+        result["tokens_per_sec"] = tokens / seconds if seconds else None
+        result["mb_per_sec"] = size / 1e6 / seconds if seconds else None
+    return result
+
+
+def _bench_in_process(config, corpus, repeat, phases):
+    if isinstance(corpus, dict):
+        code = generate_corpus(**corpus)
+    else:
+        with open(corpus, 'r', encoding='utf-8', errors='replace') as f:
+            code = f.read()
+    return bench_config(config, code, repeat, phases)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(configs, corpus, repeat=3, phases=PHASES):
+    """Benchmark each config in its own process.
+
+    corpus is either generate_corpus() keyword arguments or a file path.
+    """
+    results = []
+    for config in configs:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            results.append(executor.submit(_bench_in_process, config, corpus, repeat, phases).result())
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": corpus,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the lexical analyzer")
+    parser.add_argument("--file", help="benchmark this source file instead of a synthetic corpus")
+    parser.add_argument("--size", type=int, default=1000000, help="synthetic corpus size in characters")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--line-length", type=int, default=60)
+    parser.add_argument("--comment-density", type=float, default=0.1)
+    parser.add_argument("--string-density", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--save-corpus", metavar="FILE", help="write the synthetic corpus to FILE and exit")
+    parser.add_argument("--configs", nargs="+", metavar="JSON",
+                        help='analyzer options per run, e.g. \'{"engine": "master"}\' (default: every engine)')
+    parser.add_argument("--phases", nargs="+", choices=PHASES, default=list(PHASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", metavar="FILE", help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    corpus = args.file or {
+        "size": args.size, "seed": args.seed, "line_length": args.line_length,
+        "comment_density": args.comment_density, "string_density": args.string_density,
+        "error_rate": args.error_rate,
+    }
+    if args.save_corpus:
+        if args.file:
+            parser.error("--save-corpus only applies to the synthetic corpus")
+        with open(args.save_corpus, 'w') as f:
+            f.write(generate_corpus(**corpus))
+        return 0
+    if args.configs:
+        configs = [json.loads(config) for config in args.configs]
+    else:
+        configs = [{"engine": engine} for engine in LexicalAnalyzer.ENGINES]
+
+    report = run_benchmarks(configs, corpus, args.repeat, args.phases)
+    for result in report["results"]:
+        print(f"{json.dumps(result['config'])}: {result['tokens']:,} tokens, {result['errors']:,} errors")
+        for phase, timing in result["timings"].items():
+            print(f"  {phase}: {timing['best'] * 1000:.1f} ms (mean {timing['mean'] * 1000:.1f} ms)")
+        if "tokens_per_sec" in result:
+            print(f"  {result['tokens_per_sec']:,.0f} tokens/sec, {result['mb_per_sec']:.2f} MB/sec")
+        if result["peak_rss_bytes"] is not None:
+            print(f"  peak RSS: {result['peak_rss_bytes'] / 1e6:.1f} MB")
+        print(f"  traced memory: peak {result['alloc_peak_bytes'] / 1e6:.1f} MB, retained "
+              f"{result['alloc_retained_bytes'] / 1e6:.1f} MB in {result['alloc_retained_blocks']:,} blocks")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
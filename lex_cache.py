@@ -0,0 +1,170 @@
+"""Persistent content-hash cache of analyzer results.
+
+Entries are keyed by a hash of the source bytes plus
+LexicalAnalyzer.fingerprint(), so changing keywords, operators or patterns
+never returns stale tokens. Each entry holds the serialized token and error
+TokenStores. The directory is kept under max_bytes by evicting the least
+recently used entries; a hit refreshes an entry's mtime. Several processes
+may share a directory, so the running size kept by each LexCache is only an
+estimate: the directory is measured again once the estimate passes
+max_bytes or after every max_bytes / 16 written. Eviction then goes down to
+LOW_WATER of max_bytes, so it runs in batches rather than on every write.
+Entries that cannot be decoded count as misses and are deleted.
+
+    cache = LexCache(".lexcache")
+    cache.analyze(analyzer, code)   # fills analyzer.tokens / analyzer.errors
+    print(cache.stats())
+"""
+import hashlib
+import os
+import struct
+import tempfile
+
+from lex_core import TokenStore
+
+ENTRY_SUFFIX = ".lex"
+LOW_WATER = 0.9  # eviction brings the directory down to this share of max_bytes
+RESCAN_SHARE = 1 / 16  # share of max_bytes written before the directory is measured again
+
+
+class LexCache:
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self.size = self._disk_size()
+        self._unmeasured = 0  # bytes written since the directory was last measured
+
+    def _entries(self):
+        return [entry for entry in os.scandir(self.directory)
+                if entry.is_file() and entry.name.endswith(ENTRY_SUFFIX)]
+
+    def _entry_stats(self):
+        """(mtime, size, path) of each entry; ones removed meanwhile by another process are skipped"""
+        stats = []
+        for entry in self._entries():
+            try:
+                status = entry.stat()
+            except OSError:
+                continue
+            stats.append((status.st_mtime, status.st_size, entry.path))
+        return stats
+
+    def _disk_size(self):
+        return sum(size for mtime, size, path in self._entry_stats())
+
+    def key(self, analyzer, code):
+        # str sources are hashed as UTF-8; bytes and mmap sources as they are.
+        # Offsets count characters for str and bytes otherwise, so the kind
+        # of source is part of the key too.
+        if isinstance(code, str):
+            digest = hashlib.sha256(b"str\0" + code.encode('utf-8', 'surrogatepass'))
+        else:
+            digest = hashlib.sha256(b"bytes\0")
+            digest.update(code)
+        digest.update(analyzer.fingerprint().encode('ascii'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key, source):
+        """Return (tokens, errors) stores for key, or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # mark as recently used
+        except OSError:
+            self.misses += 1
+            return None
+        split = struct.calcsize('<Q')
+        try:
+            tokens_size, = struct.unpack_from('<Q', data)
+            tokens = TokenStore.from_bytes(data[split:split + tokens_size], source)
+            errors = TokenStore.from_bytes(data[split + tokens_size:], source)
+        except (struct.error, ValueError, KeyError, TypeError):
+            # Truncated or corrupt entry: drop it and lex again
+            self._remove(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return tokens, errors
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def put(self, key, tokens, errors):
+        tokens_blob = tokens.to_bytes()
+        data = struct.pack('<Q', len(tokens_blob)) + tokens_blob + errors.to_bytes()
+        # Write to a temporary file first so readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        path = self._path(key)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        os.replace(tmp, path)
+        self.size += len(data) - replaced
+        self._unmeasured += len(data)
+        if self.size > self.max_bytes or self._unmeasured > RESCAN_SHARE * self.max_bytes:
+            # Other processes may have written entries too, so measure the directory
+            self.size = self._disk_size()
+            self._unmeasured = 0
+            if self.size > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache is within LOW_WATER of max_bytes"""
+        entries = sorted(self._entry_stats())
+        self.size = sum(size for mtime, size, path in entries)
+        target = LOW_WATER * self.max_bytes
+        for mtime, size, path in entries:
+            if self.size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.size -= size
+            self.evictions += 1
+
+    def analyze(self, analyzer, code):
+        """Like analyzer.analyze(code), but served from the cache when possible.
+
+        Returns True on a cache hit.
+        """
+        key = self.key(analyzer, code)
+        cached = self.get(key, code)
+        if cached is not None:
+            analyzer.adopt_results(*cached)
+            return True
+        analyzer.analyze(code)
+        self.put(key, analyzer.tokens, analyzer.errors)
+        return False
+
+    def clear(self):
+        for entry in self._entries():
+            os.remove(entry.path)
+        self.size = 0
+        self._unmeasured = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries()),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,213 @@
+"""Headless command-line entry point that streams tokens in machine-readable formats.
+
+    python lex_cli.py main.cpp --format jsonl > tokens.jsonl
+    cat main.cpp | python lex_cli.py - --format csv -o tokens.csv
+    python lex_cli.py huge.cpp --mmap --format binary -o tokens.lext
+
+Tokens and errors are written in source order while the input is lexed;
+nothing is collected first. Records are batched and written in bulk. By
+default the input is read in chunks and decoded incrementally, with
+undecodable bytes replaced by U+FFFD unless --errors says otherwise. With
+--mmap the file (or stdin redirected from a file) is memory-mapped and
+lexed in place; offsets and columns then count bytes instead of characters.
+Piped stdin cannot be mapped and is read in chunks as usual.
+
+Binary format: b"LEXT", a version byte and a type count byte, then each
+type name as a length byte plus UTF-8. After that, each record is
+struct "<BQIII" (type index, offset, line, column, value length) followed
+by the UTF-8 value. read_binary() reads it back.
+"""
+import argparse
+import csv
+import io
+import json
+import mmap
+import os
+import stat
+import struct
+import sys
+
+from lex_core import LexicalAnalyzer, Token, TokenStore, TokenType, load_source_mapped
+
+FORMATS = ("jsonl", "csv", "binary")
+BINARY_MAGIC = b"LEXT"
+BINARY_VERSION = 1
+RECORD = struct.Struct("<BQIII")
+
+
+class _BufferedExporter:
+    """Collect encoded records and hand them to the output batch_size at a time"""
+    def __init__(self, out, batch_size=4096):
+        self.out = out
+        self.batch_size = batch_size
+        self.pending = []
+        self.count = 0
+
+    def _add(self, data):
+        self.pending.append(data)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.out.write(b"".join(self.pending))
+            self.pending = []
+
+    def close(self):
+        self.flush()
+        self.out.flush()
+
+
+class JsonLinesExporter(_BufferedExporter):
+    def write(self, token):
+        self.count += 1
+        record = {"type": token.type.value, "value": token.value, "line": token.line_number,
+                  "column": token.column, "offset": token.offset}
+        self._add(json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n")
+
+
+class CsvExporter(_BufferedExporter):
+    HEADER = ("type", "value", "line", "column", "offset")
+
+    def __init__(self, out, batch_size=4096):
+        super().__init__(out, batch_size)
+        self.text = io.StringIO()
+        self.writer = csv.writer(self.text, lineterminator="\n")
+        self.writer.writerow(self.HEADER)
+
+    def write(self, token):
+        self.count += 1
+        self.writer.writerow((token.type.value, token.value, token.line_number, token.column, token.offset))
+        if self.count % self.batch_size == 0:
+            self.flush()
+
+    def flush(self):
+        if self.text.tell():
+            self.out.write(self.text.getvalue().encode('utf-8'))
+            self.text.seek(0)
+            self.text.truncate()
+
+
+class BinaryExporter(_BufferedExporter):
+    def __init__(self, out, batch_size=4096):
+        super().__init__(out, batch_size)
+        header = [BINARY_MAGIC, bytes((BINARY_VERSION, len(TokenStore.TYPES)))]
+        for token_type in TokenStore.TYPES:
+            name = token_type.value.encode('utf-8')
+            header.append(bytes((len(name),)) + name)
+        self._add(b"".join(header))
+
+    def write(self, token):
+        self.count += 1
+        value = token.value.encode('utf-8')
+        self._add(RECORD.pack(TokenStore.TYPE_CODES[token.type], token.offset,
+                              token.line_number, token.column, len(value)) + value)
+
+
+EXPORTERS = {"jsonl": JsonLinesExporter, "csv": CsvExporter, "binary": BinaryExporter}
+
+
+def read_binary(fileobj):
+    """Yield the Tokens of a stream written in the binary format"""
+    if fileobj.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise ValueError("Not a binary token stream")
+    version, type_count = fileobj.read(2)
+    if version != BINARY_VERSION:
+        raise ValueError(f"Unsupported binary token stream version: {version}")
+    by_name = {token_type.value: token_type for token_type in TokenStore.TYPES}
+    types = []
+    for _ in range(type_count):
+        length = fileobj.read(1)[0]
+        types.append(by_name[fileobj.read(length).decode('utf-8')])
+    while True:
+        record = fileobj.read(RECORD.size)
+        if not record:
+            return
+        code, offset, line, column, length = RECORD.unpack(record)
+        yield Token(types[code], fileobj.read(length).decode('utf-8'), line, column, offset)
+
+
+def _map_stdin():
+    """Map stdin if it is redirected from a regular file, else return None"""
+    status = os.fstat(sys.stdin.fileno())
+    if not stat.S_ISREG(status.st_mode):
+        return None
+    if status.st_size == 0:
+        return b""
+    return mmap.mmap(sys.stdin.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lex a source file and stream the tokens")
+    parser.add_argument("input", nargs="?", default="-", help="source file, or - for stdin (default)")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--mmap", action="store_true", help="memory-map the input instead of reading it")
+    parser.add_argument("--encoding", default="utf-8", help="input encoding when not memory-mapped")
+    parser.add_argument("--errors", choices=("replace", "strict", "ignore"), default="replace",
+                        help="what to do with undecodable input when not memory-mapped")
+    parser.add_argument("--multiline-comments", action="store_true", help="let /* */ comments span lines")
+    parser.add_argument("--skip-errors", action="store_true", help="leave errors out of the output")
+    parser.add_argument("--engine", choices=LexicalAnalyzer.ENGINES, default="sequential")
+    parser.add_argument("--classify", choices=LexicalAnalyzer.CLASSIFY_MODES, default="regex")
+    parser.add_argument("--recovery", choices=LexicalAnalyzer.RECOVERY_POLICIES, default="symbol")
+    parser.add_argument("--batch-size", type=int, default=4096, help="records per bulk write")
+    parser.add_argument("--summary", action="store_true", help="print per-type counts to stderr")
+    args = parser.parse_args(argv)
+
+    analyzer = LexicalAnalyzer(engine=args.engine, classify=args.classify, recovery=args.recovery)
+    from_stdin = args.input == "-"
+    infile = None
+    source = None
+    try:
+        if args.mmap:
+            # Pipes cannot be mapped; they fall back to chunked reading below
+            source = _map_stdin() if from_stdin else load_source_mapped(args.input)
+        if source is not None:
+            tokens = analyzer.iter_source(source, args.multiline_comments)
+        else:
+            infile = sys.stdin.buffer if from_stdin else open(args.input, 'rb')
+            tokens = analyzer.iter_tokens(infile, multiline_comments=args.multiline_comments,
+                                          encoding=args.encoding, errors=args.errors)
+        out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    except OSError as e:
+        if isinstance(source, mmap.mmap):
+            source.close()
+        if infile is not None and infile is not sys.stdin.buffer:
+            infile.close()
+        print(f"lex_cli: {e}", file=sys.stderr)
+        return 2
+
+    exporter = EXPORTERS[args.format](out, args.batch_size)
+    counts = dict.fromkeys(TokenStore.TYPES, 0)
+    try:
+        for token in tokens:
+            counts[token.type] += 1
+            if args.skip_errors and token.type == TokenType.ERROR:
+                continue
+            exporter.write(token)
+        exporter.close()
+    except UnicodeDecodeError as e:
+        print(f"lex_cli: {args.input}: {e}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        # Downstream stopped reading (e.g. | head); keep the interpreter
+        # from failing again when it flushes stdout on exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+        if infile is not None and infile is not sys.stdin.buffer:
+            infile.close()
+        if isinstance(source, mmap.mmap):
+            source.close()
+
+    if args.summary:
+        for token_type, count in counts.items():
+            print(f"{token_type.value}: {count}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1046 @@
+"""Lexing core: token types, columnar token storage and the LexicalAnalyzer.
+
+Only the standard library is used and importing has no side effects, so
+worker processes and other library users get the analyzer without
+colorama. The colorized program is Lexical_Analyzer.py; table
+rendering lives in lex_ui.py and is imported on first display.
+"""
+import re
+import os
+import sys
+import json
+import codecs
+import hashlib
+import mmap
+from array import array
+from bisect import bisect_left, bisect_right
+from time import perf_counter
+from enum import Enum
+from functools import lru_cache
+from itertools import starmap
+
+class TokenType(Enum):
+    KEYWORD = "Keyword"
+    IDENTIFIER = "Identifier"
+    OPERATOR = "Operator"
+    LITERAL = "Literal"
+    PUNCTUATION = "Punctuation"
+    SPECIAL_CHAR = "Special Character"
+    CONSTANT = "Constant"
+    ERROR = "Error"
+
+class Token:
+    __slots__ = ("type", "value", "line_number", "column", "offset")
+    
+    def __init__(self, token_type, value, line_number, column=None, offset=None):
+        self.type = token_type
+        self.value = value
+        self.line_number = line_number
+        self.column = column  # 1-based, like line_number
+        self.offset = offset  # 0-based character offset into the source
+    
+    def __str__(self):
+        # Plain text; lex_ui.format_token() gives the colored form
+        return f"{self.type.value}: {self.value} (Line {self.line_number})"
+    
+    def to_row(self):
+        from lex_ui import token_row
+        return token_row(self)
+
+class TokenView:
+    """Read-only window onto a TokenStore: a run of store positions.
+    
+    positions of None means every token in the store. Nothing is copied;
+    tokens are built from the store as they are read.
+    """
+    def __init__(self, store, positions=None, lo=0, hi=None):
+        self.store = store
+        self.positions = positions
+        self.lo = lo
+        self.hi = len(positions if positions is not None else store) if hi is None else hi
+    
+    def _position(self, index):
+        index = self.lo + index
+        return index if self.positions is None else self.positions[index]
+    
+    def __len__(self):
+        return self.hi - self.lo
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        return self.store[self._position(range(len(self))[index])]
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.store[self._position(index)]
+    
+    def _bisect_line(self, line_number):
+        """First index whose token is on or after line_number"""
+        lines = self.store.lines
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if lines[self._position(mid)] < line_number:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def in_lines(self, first, last):
+        """View of the tokens on lines first..last inclusive"""
+        return TokenView(self.store, self.positions,
+                         self.lo + self._bisect_line(first),
+                         self.lo + self._bisect_line(last + 1))
+
+class ShiftedArray:
+    """Integer array whose tail carries a pending delta.
+    
+    Entries from index step onwards read as data[i] + delta. Shifting the
+    tail after an edit just moves step, which costs the distance from the
+    previous edit rather than the length of the array (the "step" trick
+    editors use for their line tables).
+    """
+    def __init__(self, typecode, values=()):
+        self.data = array(typecode, values)
+        self.step = len(self.data)
+        self.delta = 0
+    
+    def __len__(self):
+        return len(self.data)
+    
+    def __getitem__(self, index):
+        value = self.data[index]
+        if index < 0:
+            index += len(self.data)
+        return value + self.delta if index >= self.step else value
+    
+    def __iter__(self):
+        return iter(self.settle())
+    
+    def append(self, value):
+        self.data.append(value - self.delta)
+    
+    def _move_step(self, index):
+        """Make index the step without changing any value"""
+        data = self.data
+        if self.delta and index > self.step:
+            data[self.step:index] = array(data.typecode, map(self.delta.__add__, data[self.step:index]))
+        elif self.delta and index < self.step:
+            data[index:self.step] = array(data.typecode, map((-self.delta).__add__, data[index:self.step]))
+        self.step = index
+    
+    def shift(self, index, delta):
+        """Add delta to every entry from index on"""
+        self._move_step(index)
+        self.delta += delta
+    
+    def splice(self, lo, hi, values):
+        """Replace entries lo:hi with values (an array of the same typecode)"""
+        self._move_step(hi)
+        self.data[lo:hi] = values
+        self.step = lo + len(values)
+    
+    def settle(self):
+        """Apply the pending delta and return the underlying array"""
+        self._move_step(len(self.data))
+        self.delta = 0
+        return self.data
+
+class TokenStore:
+    """Columnar token storage backed by parallel arrays.
+    
+    Each entry is a type code, start offset, length, line and column, about
+    21 bytes per token. Values stay in the source buffer and Token objects
+    are only built when an entry is read.
+    """
+    TYPES = list(TokenType)
+    TYPE_CODES = {token_type: code for code, token_type in enumerate(TYPES)}
+    
+    def __init__(self, source=""):
+        self.source = source
+        self.types = array('B')
+        self.starts = ShiftedArray('q')
+        self.lengths = array('i')
+        self.lines = ShiftedArray('i')
+        self.columns = array('i')
+        # Per-type index: store positions grouped by type code, kept in
+        # token order so line ranges can be found by binary search
+        self.positions = [ShiftedArray('i') for _ in self.TYPES]
+    
+    def append(self, token_type, start, stop, line_number, column):
+        code = self.TYPE_CODES[token_type]
+        self.positions[code].append(len(self.types))
+        self.types.append(code)
+        self.starts.append(start)
+        self.lengths.append(stop - start)
+        self.lines.append(line_number)
+        self.columns.append(column)
+    
+    def count(self, token_type):
+        return len(self.positions[self.TYPE_CODES[token_type]])
+    
+    def value(self, index):
+        """Token text; slices of a bytes or mmap source are decoded only here"""
+        start = self.starts[index]
+        value = self.source[start:start + self.lengths[index]]
+        if not isinstance(value, str):
+            value = value.decode('utf-8', 'replace')
+        return value
+    
+    def __len__(self):
+        return len(self.types)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        index = range(len(self))[index]
+        return Token(self.TYPES[self.types[index]], self.value(index),
+                     self.lines[index], self.columns[index], self.starts[index])
+    
+    def rows(self):
+        """Yield (type, value, line, column, offset) for every entry, in order.
+        
+        Walks the settled columns together instead of indexing per token,
+        and builds no Token objects.
+        """
+        source = self.source
+        decode = not isinstance(source, str)
+        types = self.TYPES
+        for code, start, length, line, column in zip(self.types, self.starts.settle(), self.lengths,
+                                                     self.lines.settle(), self.columns):
+            value = source[start:start + length]
+            if decode:
+                value = value.decode('utf-8', 'replace')
+            yield types[code], value, line, column, start
+    
+    def __iter__(self):
+        return starmap(Token, self.rows())
+    
+    def get_tokens_by_type(self, token_type):
+        return TokenView(self, self.positions[self.TYPE_CODES[token_type]])
+    
+    def in_lines(self, first, last):
+        """View of the tokens on lines first..last inclusive"""
+        return TokenView(self).in_lines(first, last)
+    
+    def splice(self, lo, hi, part, offset_delta, line_delta):
+        """Replace entries lo:hi with the entries of part and shift the ones after.
+        
+        part must be lexed from the new source; entries after hi move by
+        offset_delta characters and line_delta lines. The shifts are pending
+        deltas on ShiftedArrays, so no per-token work is done on the tail.
+        """
+        count_delta = len(part) - (hi - lo)
+        for code, positions in enumerate(self.positions):
+            first = bisect_left(positions, lo)
+            last = bisect_left(positions, hi)
+            added = part.positions[code].settle()
+            positions.splice(first, last, array(added.typecode, map(lo.__add__, added)))
+            positions.shift(first + len(added), count_delta)
+        self.types[lo:hi] = part.types
+        self.starts.splice(lo, hi, part.starts.settle())
+        self.starts.shift(lo + len(part), offset_delta)
+        self.lengths[lo:hi] = part.lengths
+        self.lines.splice(lo, hi, part.lines.settle())
+        self.lines.shift(lo + len(part), line_delta)
+        self.columns[lo:hi] = part.columns
+        self.source = part.source
+    
+    def _arrays(self):
+        """The plain arrays behind the store, with pending shifts applied"""
+        return ([self.types, self.starts.settle(), self.lengths, self.lines.settle(), self.columns] +
+                [positions.settle() for positions in self.positions])
+    
+    def nbytes(self):
+        """Memory used by the arrays, not counting the shared source buffer"""
+        return sum(column.itemsize * len(column) for column in self._arrays())
+    
+    def to_bytes(self):
+        """Serialize the arrays (not the source) as a JSON header line plus raw array bytes"""
+        columns = self._arrays()
+        header = {"byteorder": sys.byteorder, "lengths": [len(column) for column in columns]}
+        return json.dumps(header).encode('ascii') + b"\n" + b"".join(column.tobytes() for column in columns)
+    
+    @classmethod
+    def from_bytes(cls, data, source):
+        """Rebuild a store written by to_bytes() over the same source"""
+        newline = data.index(b"\n")
+        header = json.loads(data[:newline])
+        store = cls(source)
+        offset = newline + 1
+        columns = store._arrays()
+        if len(header["lengths"]) != len(columns):
+            raise ValueError("TokenStore data has the wrong number of arrays")
+        for column, length in zip(columns, header["lengths"]):
+            size = length * column.itemsize
+            if offset + size > len(data):
+                raise ValueError("TokenStore data is truncated")
+            column.frombytes(data[offset:offset + size])
+            if header["byteorder"] != sys.byteorder:
+                column.byteswap()
+            offset += size
+        return store
+
+class HeavyHitters:
+    """Bounded frequent-items sketch (Misra-Gries) for token values.
+    
+    At most 2 * capacity values are tracked. When the table fills up, every
+    count drops by the (capacity + 1)-th largest one and values at zero are
+    forgotten, so a count is never over-reported and undercounts by at most
+    total / (capacity + 1).
+    """
+    def __init__(self, capacity=64):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.counts = {}
+        self.total = 0
+    
+    def add(self, value):
+        counts = self.counts
+        self.total += 1
+        if value in counts:
+            counts[value] += 1
+            return
+        counts[value] = 1
+        if len(counts) > 2 * self.capacity:
+            floor = sorted(counts.values(), reverse=True)[self.capacity]
+            self.counts = {value: count - floor for value, count in counts.items() if count > floor}
+    
+    def most_common(self, n=10):
+        """The n values with the highest estimated counts"""
+        items = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n]
+        return [(_decode(value), count) for value, count in items]
+
+def _decode(value):
+    return value if isinstance(value, str) else value.decode('utf-8', 'replace')
+
+class LexStats:
+    """Per-type totals and value histograms gathered without storing tokens.
+    
+    Built by LexicalAnalyzer.analyze_stats(). Keyword and operator counts are
+    exact, since both come from small fixed sets; identifiers and literals go
+    through HeavyHitters sketches so memory stays bounded on any input.
+    """
+    EXACT_TYPES = (TokenType.KEYWORD, TokenType.OPERATOR)
+    SKETCH_TYPES = (TokenType.IDENTIFIER, TokenType.LITERAL)
+    
+    def __init__(self, sketch_size=64):
+        self.type_counts = [0] * len(TokenStore.TYPES)
+        self.lines = 0
+        self.exact = {token_type: {} for token_type in self.EXACT_TYPES}
+        self.sketches = {token_type: HeavyHitters(sketch_size) for token_type in self.SKETCH_TYPES}
+    
+    def add(self, token_type, value):
+        self.type_counts[TokenStore.TYPE_CODES[token_type]] += 1
+        if token_type in self.exact:
+            counts = self.exact[token_type]
+            counts[value] = counts.get(value, 0) + 1
+        elif token_type in self.sketches:
+            self.sketches[token_type].add(value)
+    
+    def count(self, token_type):
+        return self.type_counts[TokenStore.TYPE_CODES[token_type]]
+    
+    @property
+    def error_count(self):
+        return self.count(TokenType.ERROR)
+    
+    def get_token_counts(self):
+        """Same shape as LexicalAnalyzer.get_token_counts()"""
+        counts = {}
+        for token_type in TokenType:
+            if token_type != TokenType.ERROR:
+                counts[token_type.value] = self.count(token_type)
+        counts["Total"] = sum(counts.values())
+        return counts
+    
+    def most_common(self, token_type, n=10):
+        """Top n values of a type: exact for keywords/operators, estimated otherwise"""
+        if token_type in self.sketches:
+            return self.sketches[token_type].most_common(n)
+        if token_type not in self.exact:
+            raise ValueError(f"No value histogram is kept for {token_type.value}")
+        items = sorted(self.exact[token_type].items(), key=lambda item: item[1], reverse=True)[:n]
+        return [(_decode(value), count) for value, count in items]
+    
+    def to_dict(self, n=10):
+        return {
+            "lines": self.lines,
+            "token_counts": self.get_token_counts(),
+            "error_count": self.error_count,
+            "top": {token_type.value: self.most_common(token_type, n)
+                    for token_type in self.EXACT_TYPES + self.SKETCH_TYPES},
+        }
+
+class LexicalAnalyzer:
+    # Scanner engines, error recovery policies and keyword classification
+    # modes selectable through the constructor. Recovery: "symbol" resumes at
+    # the next known symbol, "whitespace" at the next whitespace or symbol,
+    # and "char" drops a single character. Classification: "regex" matches
+    # keywords and constants with their own patterns, "lookup" matches an
+    # identifier and classifies it with set lookups.
+    ENGINES = ("sequential", "master")
+    RECOVERY_POLICIES = ("symbol", "whitespace", "char")
+    CLASSIFY_MODES = ("regex", "lookup")
+    
+    # Whole-string checks behind is_token_of_type() and the batch API
+    IDENTIFIER_RE = re.compile(r'[a-zA-Z_]\w*')
+    LITERAL_RE = re.compile(r'".*"|\'.\'|-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?[fFuUlL]*')
+    # classify_many() returns the first of these types a string passes
+    CLASSIFY_ORDER = (TokenType.LITERAL, TokenType.CONSTANT, TokenType.KEYWORD, TokenType.OPERATOR,
+                      TokenType.PUNCTUATION, TokenType.SPECIAL_CHAR, TokenType.IDENTIFIER)
+    MEMO_SIZE = 65536
+
+    def __init__(self, engine="sequential", recovery="symbol", classify="regex"):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown scanner engine '{engine}', expected one of {self.ENGINES}")
+        if recovery not in self.RECOVERY_POLICIES:
+            raise ValueError(f"Unknown recovery policy '{recovery}', expected one of {self.RECOVERY_POLICIES}")
+        if classify not in self.CLASSIFY_MODES:
+            raise ValueError(f"Unknown classify mode '{classify}', expected one of {self.CLASSIFY_MODES}")
+        self.engine = engine
+        self.recovery = recovery
+        self.classify = classify
+        
+        # Extended keyword list including common I/O functions
+        self.keywords = {
+            'int', 'float', 'double', 'char', 'void', 'bool', 'true', 'false',
+            'if', 'else', 'while', 'for', 'do', 'switch', 'case', 'default',
+            'break', 'continue', 'return', 'class', 'struct', 'new', 'delete',
+            'public', 'private', 'protected', 'static', 'const', 'virtual',
+            'try', 'catch', 'throw', 'namespace', 'using', 'include', 'define',
+            'auto', 'enum', 'extern', 'goto', 'register', 'sizeof', 'typedef',
+            'union', 'volatile', 'and', 'or', 'not', 'xor', 'bitand', 'bitor',
+            'compl', 'and_eq', 'or_eq', 'not_eq', 'xor_eq', 'cout', 'cin',
+            'printf', 'scanf', 'endl'
+        }
+        
+        # Standard C/C++ operators
+        self.operators = {
+            '+', '-', '*', '/', '%', '=', '!', '&', '|', '^', '~', '<', '>',
+            '==', '!=', '<=', '>=', '&&', '||', '++', '--', '+=', '-=', '*=',
+            '/=', '%=', '&=', '|=', '^=', '<<', '>>', '<<=', '>>=', '->', '::',
+            '.*', '->*'
+        }
+        
+        # Punctuation marks
+        self.punctuations = {
+            '{', '}', '[', ']', '(', ')', ',', ';', ':', '.', '?', '#'
+        }
+        
+        # Special characters (not operators or punctuation)
+        self.special_chars = {
+            '@', '$', '`', '\\'
+        }
+        
+        # Predefined constants
+        self.constants = {
+            'NULL', 'nullptr', 'EOF', 'TRUE', 'FALSE', 'MAX_PATH', 'PI'
+        }
+        
+        self.tokens = TokenStore()
+        self.errors = TokenStore()
+        self.multiline_comments = False
+        # Optional lex_profile.LexProfiler; None keeps the scanner uninstrumented
+        self.profiler = None
+        self._classify_memo = None  # built by _classifier() on first use
+        # Per-line checkpoints for update(): line start offsets (built lazily)
+        # and, with multiline comments, the comment state at each line start
+        self._line_starts = None
+        self._line_source = None
+        self._line_states = None
+        
+        # Regular expression patterns (ordered by priority)
+        self.patterns = [
+            # Comments (to be ignored)
+            (None, r'//.*|/\*.*?\*/'),
+            
+            # String literals (including escape sequences)
+            (TokenType.LITERAL, r'"(?:\\.|[^"\\])*"'),
+            
+            # Character literals
+            (TokenType.LITERAL, r"'(?:\\.|[^'\\])'"),
+            
+            # Numeric literals (integers, floats, scientific notation)
+            (TokenType.LITERAL, r'-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?[fFuUlL]*'),
+            
+            # Constants (predefined)
+            (TokenType.CONSTANT, self._word_pattern(self.constants)),
+            
+            # Keywords
+            (TokenType.KEYWORD, self._word_pattern(self.keywords)),
+            
+            # Operators (longest first to ensure proper matching)
+            (TokenType.OPERATOR, r'<<=|>>=|->\*|\+\+|--|<<|>>|<=|>=|==|!=|&&|\|\||\+=|-=|\*=|/=|%=|&=|\|=|\^=|::|->|\+\+|\-\-|\+|\-|\*|/|%|=|!|&|\||\^|~|<|>|\?|:|\.[*]'),
+            
+            # Punctuations
+            (TokenType.PUNCTUATION, r'[{}[\]();,:.#]'),
+            
+            # Special characters
+            (TokenType.SPECIAL_CHAR, r'[@$`\\]'),
+            
+            # Identifiers (must start with letter/underscore, can contain numbers)
+            (TokenType.IDENTIFIER, r'[a-zA-Z_]\w*')
+        ]
+        
+        self._compile_patterns()
+    
+    @staticmethod
+    def _word_pattern(words):
+        """Whole-word alternation for a keyword or constant set.
+        
+        Words are sorted so the pattern, and with it fingerprint(), does not
+        depend on the process's string hash seed.
+        """
+        if not words:
+            return r'(?!)'
+        return r'\b(?:' + '|'.join(re.escape(word) for word in sorted(words)) + r')\b'
+    
+    def fingerprint(self):
+        """Hash of the configuration that decides the token stream.
+        
+        The engine and classify mode are left out on purpose: they change
+        how tokens are found, not which tokens come out.
+        """
+        config = {
+            "keywords": sorted(self.keywords),
+            "constants": sorted(self.constants),
+            "operators": sorted(self.operators),
+            "punctuations": sorted(self.punctuations),
+            "special_chars": sorted(self.special_chars),
+            "patterns": [(token_type.name if token_type else None, pattern)
+                         for token_type, pattern in self.patterns],
+            "recovery": self.recovery,
+        }
+        return hashlib.sha256(json.dumps(config).encode('utf-8')).hexdigest()
+    
+    def set_keywords(self, keywords=None, constants=None):
+        """Swap the keyword and/or constant tables at runtime.
+        
+        In lookup mode the new sets are simply used by the next scan. In regex
+        mode the Keyword and Constant patterns are rebuilt and recompiled.
+        """
+        if keywords is not None:
+            self.keywords = set(keywords)
+        if constants is not None:
+            self.constants = set(constants)
+        self._classify_memo = None
+        if self.classify == "regex":
+            words = {TokenType.KEYWORD: self.keywords, TokenType.CONSTANT: self.constants}
+            self.patterns = [(token_type, self._word_pattern(words[token_type]) if token_type in words else pattern)
+                             for token_type, pattern in self.patterns]
+            self._compile_patterns()
+    
+    def _compile_patterns(self):
+        """Compile the pattern table once for the sequential and master engines.
+        
+        The str regexes are built here; bytes versions for mapped input are
+        compiled on first use by _regexes_for().
+        """
+        self._regexes = {False: self._compile_regexes(as_bytes=False)}
+    
+    def _compile_regexes(self, as_bytes):
+        # Scanning moves an index through the whole buffer instead of slicing,
+        # so a leading \b would look at the previous token ("1int" must still
+        # give Literal 1, Keyword int). (?=\w) is what \b meant at the start
+        # of a sliced line.
+        patterns = [(token_type, r'(?=\w)' + pattern[2:] if pattern.startswith(r'\b') else pattern)
+                    for token_type, pattern in self.patterns]
+        if self.classify == "lookup":
+            # Keywords and constants are found among identifiers instead
+            patterns = [(token_type, pattern) for token_type, pattern in patterns
+                        if token_type not in (TokenType.KEYWORD, TokenType.CONSTANT)]
+        
+        def compile_(pattern):
+            return re.compile(pattern.encode('utf-8') if as_bytes else pattern)
+        
+        # str.strip() also treats \x1c-\x1f as whitespace; bytes \s does not,
+        # so add them to keep ASCII input lexing the same either way
+        space = r'[\s\x1c-\x1f]' if as_bytes else r'\s'
+        ignore = [pattern for token_type, pattern in patterns if token_type is None]
+        regexes = {
+            "ignore": compile_('|'.join(ignore)),
+            "patterns": [(token_type, compile_(pattern)) for token_type, pattern in patterns
+                         if token_type is not None],
+            "space": compile_(space + '*'),
+            "resync": compile_(self._resync_pattern(space)),
+            "strip": b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f' if as_bytes else None,
+            "group_types": {},
+            "group_patterns": {},
+        }
+        
+        # Master regex: ignore patterns first, then every token pattern in
+        # priority order. Alternation tries branches left to right, so the
+        # winning group is the same one the sequential loop would pick.
+        branches = []
+        ordered = ([(None, pattern) for pattern in ignore] +
+                   [(token_type, pattern) for token_type, pattern in patterns
+                    if token_type is not None])
+        for index, (token_type, pattern) in enumerate(ordered):
+            name = f"{token_type.name if token_type else 'IGNORE'}_{index}"
+            regexes["group_types"][name] = token_type
+            regexes["group_patterns"][name] = pattern
+            branches.append(f"(?P<{name}>{pattern})")
+        regexes["master"] = compile_('|'.join(branches))
+        return regexes
+    
+    def _regexes_for(self, text):
+        """Compiled regexes for str input, or for bytes-like input such as mmap"""
+        as_bytes = not isinstance(text, str)
+        if as_bytes not in self._regexes:
+            self._regexes[as_bytes] = self._compile_regexes(as_bytes)
+        return self._regexes[as_bytes]
+    
+    def _resync_pattern(self, space=r'\s'):
+        """Pattern whose first match after a bad character is where lexing resumes"""
+        if self.recovery == "char":
+            return r'(?s).'
+        # Any symbol occurrence starts with its first character, so single
+        # character symbols go in one class; only multi-character symbols
+        # whose first character is not a symbol itself need their own branch.
+        symbols = self.operators | self.punctuations | self.special_chars
+        singles = {symbol for symbol in symbols if len(symbol) == 1}
+        branches = []
+        if singles:
+            branches.append('[' + ''.join(re.escape(symbol) for symbol in sorted(singles)) + ']')
+        branches += [re.escape(symbol) for symbol in sorted(symbols - singles)
+                     if symbol[0] not in singles]
+        if self.recovery == "whitespace":
+            branches.insert(0, space)
+        # With no symbols at all nothing resyncs, so errors run to the end of the line
+        return '|'.join(branches) or r'(?!)'
+    
+    def _matcher(self, regexes):
+        """Token matcher for the selected engine: (text, pos, eol) -> (type, end) or None.
+        
+        Comments come back with a None type.
+        """
+        if self.engine == "master":
+            master = regexes["master"].match
+            group_types = regexes["group_types"]
+            
+            def match_master(text, pos, eol):
+                # Pick the token type with a single match against the master regex
+                match = master(text, pos, eol)
+                if match:
+                    return group_types[match.lastgroup], match.end()
+                return None
+            return match_master
+        
+        ignore = regexes["ignore"].match
+        patterns = [(token_type, regex.match) for token_type, regex in regexes["patterns"]]
+        
+        def match_sequential(text, pos, eol):
+            # Try the ignore patterns, then each token pattern in order
+            match = ignore(text, pos, eol)
+            if match:
+                return None, match.end()
+            for token_type, regex_match in patterns:
+                match = regex_match(text, pos, eol)
+                if match:
+                    return token_type, match.end()
+            return None
+        return match_sequential
+        
+    def is_token_of_type(self, text, token_type):
+        """Check if text matches a specific token type pattern"""
+        if token_type == TokenType.KEYWORD:
+            return text in self.keywords
+        elif token_type == TokenType.IDENTIFIER:
+            return bool(self.IDENTIFIER_RE.fullmatch(text))
+        elif token_type == TokenType.OPERATOR:
+            return text in self.operators
+        elif token_type == TokenType.LITERAL:
+            # String, char or numeric literal
+            return bool(self.LITERAL_RE.fullmatch(text))
+        elif token_type == TokenType.PUNCTUATION:
+            return text in self.punctuations
+        elif token_type == TokenType.SPECIAL_CHAR:
+            return text in self.special_chars
+        elif token_type == TokenType.CONSTANT:
+            return text in self.constants
+        return False
+    
+    def _type_checks(self):
+        """text -> bool per token type, with the same results as is_token_of_type()"""
+        identifier = self.IDENTIFIER_RE.fullmatch
+        literal = self.LITERAL_RE.fullmatch
+        return {
+            TokenType.KEYWORD: self.keywords.__contains__,
+            TokenType.IDENTIFIER: lambda text: identifier(text) is not None,
+            TokenType.OPERATOR: self.operators.__contains__,
+            TokenType.LITERAL: lambda text: literal(text) is not None,
+            TokenType.PUNCTUATION: self.punctuations.__contains__,
+            TokenType.SPECIAL_CHAR: self.special_chars.__contains__,
+            TokenType.CONSTANT: self.constants.__contains__,
+            TokenType.ERROR: lambda text: False,
+        }
+    
+    def _classifier(self):
+        """Memoized text -> TokenType or None, rebuilt after set_keywords()"""
+        if self._classify_memo is None:
+            checks = self._type_checks()
+            ordered = [(token_type, checks[token_type]) for token_type in self.CLASSIFY_ORDER]
+            
+            @lru_cache(maxsize=self.MEMO_SIZE)
+            def classify(text):
+                for token_type, check in ordered:
+                    if check(text):
+                        return token_type
+                return None
+            self._classify_memo = classify
+        return self._classify_memo
+    
+    @staticmethod
+    def _strings(texts):
+        """Strings from any iterable; NumPy arrays are converted in one tolist() call
+        and bytes items (e.g. from an 'S' dtype) are decoded as UTF-8."""
+        if hasattr(texts, "tolist"):
+            texts = texts.tolist()
+        return (text.decode('utf-8') if isinstance(text, bytes) else text for text in texts)
+    
+    def classify_many(self, texts):
+        """Classify each string as the first type in CLASSIFY_ORDER it passes, or None.
+        
+        Checks are the ones is_token_of_type() uses, with precompiled
+        patterns and set lookups; repeated strings are answered from a
+        bounded LRU memo of MEMO_SIZE entries. Call set_keywords() rather
+        than editing the sets in place, so the memo is dropped.
+        """
+        return list(map(self._classifier(), self._strings(texts)))
+    
+    def is_token_of_type_many(self, texts, token_type):
+        """is_token_of_type(text, token_type) for every string in texts"""
+        check = self._type_checks().get(token_type, lambda text: False)
+        return list(map(check, self._strings(texts)))
+    
+    def analyze(self, code, multiline_comments=False):
+        self.tokens = TokenStore(code)
+        self.errors = TokenStore(code)
+        self.multiline_comments = multiline_comments
+        self._line_states = array('B') if multiline_comments else None
+        self._line_starts = None
+        
+        scanner = self._scan(code, multiline_comments=multiline_comments, line_states=self._line_states)
+        for token_type, start, stop, line_num, line_start in scanner:
+            if token_type == TokenType.ERROR:
+                self.errors.append(token_type, start, stop, line_num, start - line_start + 1)
+            else:
+                self.tokens.append(token_type, start, stop, line_num, start - line_start + 1)
+    
+    def adopt_results(self, tokens, errors, multiline_comments=False):
+        """Take over stores lexed elsewhere (e.g. from a cache) as if analyze() had made them.
+        
+        The per-line state used by update() is reset the way analyze()
+        resets it and rebuilt on first use.
+        """
+        self.tokens = tokens
+        self.errors = errors
+        self.multiline_comments = multiline_comments
+        self._line_states = None
+        self._line_starts = None
+    
+    def analyze_stats(self, code, multiline_comments=False, sketch_size=64):
+        """Lex code for counts and histograms only and return a LexStats.
+        
+        Nothing is stored per token, so memory stays flat however large the
+        input; self.tokens and self.errors are left untouched.
+        """
+        stats = LexStats(sketch_size)
+        add = stats.add
+        track = set(stats.EXACT_TYPES + stats.SKETCH_TYPES)
+        type_counts = stats.type_counts
+        codes = TokenStore.TYPE_CODES
+        for token_type, start, stop, line, line_start in self._scan(code, multiline_comments=multiline_comments):
+            if token_type in track:
+                add(token_type, code[start:stop])
+            else:
+                type_counts[codes[token_type]] += 1
+        newline = '\n' if isinstance(code, str) else b'\n'
+        stats.lines = 1 + sum(1 for _ in re.finditer(newline, code))
+        return stats
+    
+    def _line_index(self):
+        """Offsets of each line start in the current source, built on first use"""
+        source = self.tokens.source
+        if self._line_starts is None or self._line_source is not source:
+            starts = array('q', [0])
+            newline = '\n' if isinstance(source, str) else b'\n'
+            starts.extend(match.end() for match in re.finditer(newline, source))
+            self._line_starts = ShiftedArray('q', starts)
+            self._line_source = source
+            if self.multiline_comments and (self._line_states is None or
+                                            len(self._line_states) != len(self._line_starts)):
+                # Results came from elsewhere (e.g. a cache): recover the states
+                self._line_states = array('B')
+                for _ in self._scan(source, multiline_comments=True, line_states=self._line_states):
+                    pass
+        return self._line_starts
+    
+    def update(self, edit_start, edit_end, new_text):
+        """Replace source[edit_start:edit_end] with new_text and re-lex only what changed.
+        
+        Lexing restarts at the first edited line and continues line by line
+        until it is past the edit and the lexer state at a line start (inside
+        a /* comment or not) matches the previous run. The new tokens and
+        errors are spliced into self.tokens/self.errors, and the offsets and
+        line numbers of everything after them are shifted.
+        """
+        source = self.tokens.source
+        line_starts = self._line_index()
+        states = self._line_states
+        multiline = self.multiline_comments
+        text = source[:edit_start] + new_text + source[edit_end:]
+        offset_delta = len(new_text) - (edit_end - edit_start)
+        newline = '\n' if isinstance(text, str) else b'\n'
+        line_delta = new_text.count(newline) - source[edit_start:edit_end].count(newline)
+        first = bisect_right(line_starts, edit_start) - 1  # 0-based line indexes
+        last = bisect_right(line_starts, edit_end) - 1 + line_delta
+        
+        tokens = TokenStore(text)
+        errors = TokenStore(text)
+        new_starts = array('q')
+        new_states = array('B')
+        state = [states[first] if states else False]
+        line = first
+        pos = line_starts[first]
+        while True:
+            new_starts.append(pos)
+            new_states.append(state[0])
+            eol = text.find(newline, pos)
+            if eol < 0:
+                eol = len(text)
+            for token_type, start, stop, line_num, line_start in self._scan(text, pos, eol, line + 1, state, multiline):
+                store = errors if token_type == TokenType.ERROR else tokens
+                store.append(token_type, start, stop, line_num, start - line_start + 1)
+            line += 1
+            if eol == len(text):
+                old_stop = len(line_starts)
+                break
+            pos = eol + 1
+            if line > last and (not multiline or states[line - line_delta] == state[0]):
+                old_stop = line - line_delta
+                break
+        
+        # Old lines first..old_stop-1 are replaced by the lines just lexed
+        for store, part in ((self.tokens, tokens), (self.errors, errors)):
+            lo = bisect_left(store.lines, first + 1)
+            hi = bisect_left(store.lines, old_stop + 1)
+            store.splice(lo, hi, part, offset_delta, line_delta)
+        line_starts.splice(first, old_stop, new_starts)
+        line_starts.shift(first + len(new_starts), offset_delta)
+        if states is not None:
+            states[first:old_stop] = new_states
+        self._line_source = text
+    
+    def iter_tokens(self, fileobj, chunk_size=65536, multiline_comments=True, encoding="utf-8",
+                    errors="strict"):
+        """Lex a file object incrementally, yielding Tokens as they are found.
+        
+        Input is read chunk_size characters at a time and only the unfinished
+        last line is carried over, so memory stays bounded by the longest
+        line. Errors are yielded as Tokens of type TokenType.ERROR. Unlike
+        analyze(), /* */ comments may span lines unless multiline_comments
+        is False. Binary file objects are decoded with encoding, handling
+        undecodable bytes as the codecs errors argument says ("replace" to
+        substitute U+FFFD instead of raising).
+        """
+        decoder = None
+        buffer = ""
+        base = 0  # stream offset of buffer[0]
+        line_num = 1
+        state = [False]  # inside an unfinished /* comment
+        
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            if isinstance(chunk, bytes):
+                if decoder is None:
+                    decoder = codecs.getincrementaldecoder(encoding)(errors)
+                chunk = decoder.decode(chunk)
+            buffer += chunk
+            
+            # Only lex complete lines; tokens never cross a newline
+            cut = buffer.rfind('\n')
+            if cut < 0:
+                continue
+            scanner = self._scan(buffer, 0, cut, line_num, state, multiline_comments)
+            for token_type, start, stop, line, line_start in scanner:
+                yield Token(token_type, buffer[start:stop], line, start - line_start + 1, base + start)
+            line_num += buffer.count('\n', 0, cut) + 1
+            buffer = buffer[cut + 1:]
+            base += cut + 1
+        
+        if decoder is not None:
+            buffer += decoder.decode(b"", final=True)
+        scanner = self._scan(buffer, 0, len(buffer), line_num, state, multiline_comments)
+        for token_type, start, stop, line, line_start in scanner:
+            yield Token(token_type, buffer[start:stop], line, start - line_start + 1, base + start)
+    
+    def iter_source(self, source, multiline_comments=False):
+        """Yield Tokens (errors included) from an in-memory source without storing them.
+        
+        source may be a str or bytes-like such as an mmap from
+        load_source_mapped(); bytes values are decoded per token and
+        offsets and columns then count bytes.
+        """
+        decode = not isinstance(source, str)
+        for token_type, start, stop, line, line_start in self._scan(source, multiline_comments=multiline_comments):
+            value = source[start:stop]
+            if decode:
+                value = value.decode('utf-8', 'replace')
+            yield Token(token_type, value, line, start - line_start + 1, start)
+    
+    def _scan(self, text, start=0, end=None, line_num=1, state=None, multiline_comments=False,
+              line_states=None):
+        """Yield (type, start, stop, line, line_start) for each lexeme in text[start:end].
+        
+        A position index moves through the original buffer; nothing is sliced
+        off per token. Matches are bounded by the end of the current line and
+        whitespace is skipped the way the old per-line strip()/lstrip() did.
+        With multiline_comments, an unclosed /* carries over to later lines;
+        state is a one-item list holding that flag across calls, and
+        line_states, if given, gets the flag at the start of every line.
+        
+        text may also be bytes-like (bytes, mmap): bytes regexes then run
+        directly over the buffer and positions count bytes.
+        """
+        regexes = self._regexes_for(text)
+        match_token = self._matcher(regexes)
+        skip_space = regexes["space"].match
+        resync = regexes["resync"].search
+        profiler = self.profiler
+        if profiler is not None:
+            match_token, resync = profiler.instrument(self, regexes, match_token, resync)
+        strip = regexes["strip"]
+        lookup = self.classify == "lookup"
+        keywords = self.keywords
+        constants = self.constants
+        newline, comment_open, comment_close = '\n', '/*', '*/'
+        if not isinstance(text, str):
+            keywords = {word.encode('utf-8') for word in keywords}
+            constants = {word.encode('utf-8') for word in constants}
+            newline, comment_open, comment_close = b'\n', b'/*', b'*/'
+        if end is None:
+            end = len(text)
+        line_start = start
+        in_comment = state[0] if state else False
+        
+        while True:
+            if profiler is not None:
+                line_began = perf_counter()
+            if line_states is not None:
+                line_states.append(in_comment)
+            eol = text.find(newline, line_start, end)
+            if eol < 0:
+                eol = end
+            pos = skip_space(text, line_start, eol).end()
+            
+            if in_comment:
+                close = text.find(comment_close, pos, eol)
+                if close < 0:
+                    pos = eol
+                else:
+                    in_comment = False
+                    pos = skip_space(text, close + 2, eol).end()
+            
+            while pos < eol:
+                if (multiline_comments and text[pos:pos + 2] == comment_open
+                        and text.find(comment_close, pos + 2, eol) < 0):
+                    in_comment = True
+                    break
+                
+                # Comments come back with a None type and are skipped
+                result = match_token(text, pos, eol)
+                if result is not None:
+                    token_type, stop = result
+                    if lookup and token_type == TokenType.IDENTIFIER:
+                        word = text[pos:stop]
+                        if word in constants:
+                            token_type = TokenType.CONSTANT
+                        elif word in keywords:
+                            token_type = TokenType.KEYWORD
+                    if token_type is not None:
+                        yield token_type, pos, stop, line_num, line_start
+                    pos = skip_space(text, stop, eol).end()
+                    continue
+                
+                # Error recovery: one search for the resync point picked by
+                # self.recovery, precompiled in _compile_regexes()
+                found = resync(text, pos + 1, eol)
+                next_pos = found.start() if found else eol
+                
+                if next_pos == eol:
+                    # The rest of the line is invalid, minus trailing whitespace
+                    yield TokenType.ERROR, pos, pos + len(text[pos:eol].rstrip(strip)), line_num, line_start
+                else:
+                    yield TokenType.ERROR, pos, next_pos, line_num, line_start
+                pos = skip_space(text, next_pos, eol).end()
+            
+            if profiler is not None:
+                profiler.line(line_num, perf_counter() - line_began, text, line_start, eol)
+            if eol == end:
+                break
+            line_start = eol + 1
+            line_num += 1
+        
+        if state is not None:
+            state[0] = in_comment
+    
+    def get_tokens_by_type(self, token_type):
+        return self.tokens.get_tokens_by_type(token_type)
+    
+    def get_token_counts(self):
+        counts = {}
+        for token_type in TokenType:
+            if token_type != TokenType.ERROR:
+                counts[token_type.value] = self.tokens.count(token_type)
+        counts["Total"] = len(self.tokens)
+        return counts
+    
+    def save_tokens_to_file(self, filename="Token.txt"):
+        with open(filename, 'w') as f:
+            # Write token counts first
+            counts = self.get_token_counts()
+            f.write("TOKEN COUNTS:\n")
+            for token_type, count in counts.items():
+                f.write(f"{token_type}: {count}\n")
+            
+            # Write all tokens
+            f.write("\nALL TOKENS:\n")
+            f.writelines(f"{token_type.value}: {value} (Line {line})\n"
+                         for token_type, value, line, column, offset in self.tokens.rows())
+    
+    def save_errors_to_file(self, filename="Error.txt"):
+        with open(filename, 'w') as f:
+            f.write(f"Total Errors: {len(self.errors)}\n\n")
+            f.writelines(f"Error: {value} (Line {line})\n"
+                         for token_type, value, line, column, offset in self.errors.rows())
+    
+    def display_tokens_table(self, tokens=None):
+        # Rendering needs colorama, so lex_ui loads on first use
+        from lex_ui import display_tokens_table
+        display_tokens_table(self, tokens)
+    
+    def display_errors_table(self):
+        from lex_ui import display_errors_table
+        display_errors_table(self)
+
+# Files at least this large are memory-mapped by the interactive loader
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+def load_source_mapped(filename):
+    """Memory-map a source file read-only for zero-copy lexing.
+    
+    analyze() runs bytes regexes straight over the mapping, so the file is
+    never decoded or split into lines; token values are decoded only when
+    read. Positions and columns then count bytes, and only ASCII letters
+    form identifiers.
+    """
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
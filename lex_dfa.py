@@ -0,0 +1,555 @@
+"""Table-driven DFA lexer generated from pluggable language definitions.
+
+A language definition is a dict (or a JSON/TOML file) using the same
+categories as TokenType:
+
+    {
+        "name": "c++",
+        "keywords": ["int", "return", ...],
+        "constants": ["NULL", ...],
+        "operators": ["+", "<<=", ...],
+        "punctuations": ["{", ";", ...],
+        "special_chars": ["@", ...],
+        "rules": [["Literal", "[0-9]+"], ["Identifier", "[a-zA-Z_][a-zA-Z0-9_]*"]],
+        "skip": ["[ \\t\\r\\n]+", "//[^\\n]*"]
+    }
+
+compile_language() turns it into a DFA whose tables can be saved once and
+loaded instantly later. DFALexer scans str or bytes-like input (bytes,
+memoryview, mmap) with longest-match semantics. When two rules match the
+same length, the earlier one wins in the order constants, keywords,
+operators, punctuations, special_chars, then "rules". Each character costs
+one table lookup. Maximal munch re-reads characters after a failed
+lookahead, so the scanner remembers every (state, position) it has seen
+fail (Reps, "Maximal-munch tokenization in linear time") and gives up as
+soon as it reaches one again; each pair fails at most once, so the scan is
+linear in the input for any token set.
+
+Rule regexes support literals, escapes, [...] classes, ., groups,
+alternation and the * + ? {m,n} quantifiers. \\d \\w \\s are ASCII-only.
+"""
+import base64
+import json
+import sys
+from array import array
+from bisect import bisect_right
+
+from lex_core import LexicalAnalyzer, Token, TokenType
+
+MAX_CODE_POINT = 0x10FFFF
+
+# Definition keys holding literal strings, in priority order
+LITERAL_CATEGORIES = [
+    ("constants", TokenType.CONSTANT),
+    ("keywords", TokenType.KEYWORD),
+    ("operators", TokenType.OPERATOR),
+    ("punctuations", TokenType.PUNCTUATION),
+    ("special_chars", TokenType.SPECIAL_CHAR),
+]
+
+_ESCAPE_CLASSES = {
+    'd': [(48, 57)],
+    'w': [(48, 57), (65, 90), (95, 95), (97, 122)],
+    's': [(9, 13), (32, 32)],
+}
+_ESCAPE_CHARS = {'n': '\n', 't': '\t', 'r': '\r', 'f': '\f', 'v': '\v', '0': '\0'}
+
+
+def _normalize(intervals):
+    """Sort and merge overlapping or adjacent (lo, hi) intervals"""
+    merged = []
+    for lo, hi in sorted(intervals):
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(hi, merged[-1][1]))
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+def _complement(intervals):
+    result = []
+    nxt = 0
+    for lo, hi in _normalize(intervals):
+        if lo > nxt:
+            result.append((nxt, lo - 1))
+        nxt = hi + 1
+    if nxt <= MAX_CODE_POINT:
+        result.append((nxt, MAX_CODE_POINT))
+    return result
+
+
+class RegexParser:
+    """Parse the supported regex subset into a small AST.
+
+    Nodes are tuples: ('set', intervals), ('cat', [nodes]), ('alt', [nodes]),
+    ('star', node), ('plus', node), ('opt', node) and ('eps',).
+    """
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.pos = 0
+
+    def error(self, message):
+        return ValueError(f"{message} at position {self.pos} in pattern {self.pattern!r}")
+
+    def peek(self):
+        return self.pattern[self.pos] if self.pos < len(self.pattern) else None
+
+    def next(self):
+        char = self.peek()
+        if char is None:
+            raise self.error("Unexpected end of pattern")
+        self.pos += 1
+        return char
+
+    def parse(self):
+        node = self.parse_alt()
+        if self.pos != len(self.pattern):
+            raise self.error("Unbalanced ')'")
+        return node
+
+    def parse_alt(self):
+        branches = [self.parse_seq()]
+        while self.peek() == '|':
+            self.pos += 1
+            branches.append(self.parse_seq())
+        return branches[0] if len(branches) == 1 else ('alt', branches)
+
+    def parse_seq(self):
+        items = []
+        while self.peek() not in (None, '|', ')'):
+            items.append(self.parse_quantified(self.parse_atom()))
+        if not items:
+            return ('eps',)
+        return items[0] if len(items) == 1 else ('cat', items)
+
+    def parse_quantified(self, node):
+        while True:
+            char = self.peek()
+            if char == '*':
+                node = ('star', node)
+            elif char == '+':
+                node = ('plus', node)
+            elif char == '?':
+                node = ('opt', node)
+            elif char == '{':
+                node = self.parse_repeat(node)
+                continue
+            else:
+                return node
+            self.pos += 1
+
+    def parse_repeat(self, node):
+        close = self.pattern.find('}', self.pos)
+        if close < 0:
+            raise self.error("Unterminated '{'")
+        bounds = self.pattern[self.pos + 1:close].split(',')
+        try:
+            low = int(bounds[0])
+            high = low if len(bounds) == 1 else (int(bounds[1]) if bounds[1] else None)
+        except ValueError:
+            raise self.error("Bad repeat count") from None
+        self.pos = close + 1
+        items = [node] * low
+        if high is None:
+            items.append(('star', node))
+        else:
+            items += [('opt', node)] * (high - low)
+        if not items:
+            return ('eps',)
+        return items[0] if len(items) == 1 else ('cat', items)
+
+    def parse_atom(self):
+        char = self.next()
+        if char == '(':
+            if self.pattern.startswith('?:', self.pos):
+                self.pos += 2
+            node = self.parse_alt()
+            if self.next() != ')':
+                raise self.error("Missing ')'")
+            return node
+        if char == '[':
+            return ('set', self.parse_class())
+        if char == '.':
+            return ('set', _complement([(10, 10)]))
+        if char == '\\':
+            return ('set', self.parse_escape())
+        if char in '*+?{':
+            raise self.error(f"Nothing to repeat before '{char}'")
+        return ('set', [(ord(char), ord(char))])
+
+    def parse_escape(self):
+        char = self.next()
+        if char.lower() in _ESCAPE_CLASSES:
+            intervals = _ESCAPE_CLASSES[char.lower()]
+            return _complement(intervals) if char.isupper() else list(intervals)
+        char = _ESCAPE_CHARS.get(char, char)
+        return [(ord(char), ord(char))]
+
+    def parse_class(self):
+        negate = self.peek() == '^'
+        if negate:
+            self.pos += 1
+        intervals = []
+        first = True
+        while True:
+            char = self.next()
+            if char == ']' and not first:
+                break
+            first = False
+            if char == '\\':
+                escaped = self.parse_escape()
+                if len(escaped) != 1 or escaped[0][0] != escaped[0][1]:
+                    intervals += escaped
+                    continue
+                low = escaped[0][0]
+            else:
+                low = ord(char)
+            if self.peek() == '-' and self.pattern[self.pos + 1:self.pos + 2] not in ('', ']'):
+                self.pos += 1
+                char = self.next()
+                high = self.parse_escape()[0][0] if char == '\\' else ord(char)
+                if high < low:
+                    raise self.error("Bad character range")
+                intervals.append((low, high))
+            else:
+                intervals.append((low, low))
+        intervals = _normalize(intervals)
+        return _complement(intervals) if negate else intervals
+
+
+def _literal_node(text):
+    return ('cat', [('set', [(ord(char), ord(char))]) for char in text])
+
+
+class _NFA:
+    """Thompson NFA: epsilon edges plus (intervals, target) edges per state"""
+    def __init__(self):
+        self.eps = []
+        self.edges = []
+
+    def state(self):
+        self.eps.append([])
+        self.edges.append([])
+        return len(self.eps) - 1
+
+    def build(self, node):
+        """Return (start, end) states for an AST node"""
+        kind = node[0]
+        start = self.state()
+        if kind == 'set':
+            end = self.state()
+            self.edges[start].append((node[1], end))
+        elif kind == 'eps':
+            end = self.state()
+            self.eps[start].append(end)
+        elif kind == 'cat':
+            end = start
+            for child in node[1]:
+                child_start, child_end = self.build(child)
+                self.eps[end].append(child_start)
+                end = child_end
+        elif kind == 'alt':
+            end = self.state()
+            for child in node[1]:
+                child_start, child_end = self.build(child)
+                self.eps[start].append(child_start)
+                self.eps[child_end].append(end)
+        elif kind in ('star', 'plus', 'opt'):
+            end = self.state()
+            child_start, child_end = self.build(node[1])
+            self.eps[start].append(child_start)
+            self.eps[child_end].append(end)
+            if kind != 'plus':
+                self.eps[start].append(end)
+            if kind != 'opt':
+                self.eps[child_end].append(child_start)
+        else:
+            raise ValueError(f"Unknown regex node {kind!r}")
+        return start, end
+
+    def closure(self, states):
+        stack = list(states)
+        seen = set(states)
+        while stack:
+            for target in self.eps[stack.pop()]:
+                if target not in seen:
+                    seen.add(target)
+                    stack.append(target)
+        return frozenset(seen)
+
+
+class DFATables:
+    """Compiled, serializable lexer tables.
+
+    bounds splits the code point space into character classes (class i is
+    [bounds[i], bounds[i + 1])). table[state * nclasses + cls] is the next
+    state or -1, and accept[state] is the winning rule index or -1.
+    categories[rule] is a TokenType value, or None for skipped text.
+    """
+    FORMAT = "lex-dfa"
+    VERSION = 1
+
+    def __init__(self, name, categories, bounds, table, accept):
+        self.name = name
+        self.categories = categories
+        self.bounds = bounds
+        self.table = table
+        self.accept = accept
+        self.nclasses = len(bounds)
+        self.ascii_classes = [bisect_right(bounds, code) - 1 for code in range(128)]
+
+    @property
+    def nstates(self):
+        return len(self.accept)
+
+    def class_of(self, code):
+        return self.ascii_classes[code] if code < 128 else bisect_right(self.bounds, code) - 1
+
+    def to_dict(self):
+        return {
+            "format": self.FORMAT,
+            "version": self.VERSION,
+            "name": self.name,
+            "categories": self.categories,
+            "bounds": self.bounds,
+            "byteorder": sys.byteorder,
+            "table": base64.b64encode(self.table.tobytes()).decode('ascii'),
+            "accept": base64.b64encode(self.accept.tobytes()).decode('ascii'),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("format") != cls.FORMAT or data.get("version") != cls.VERSION:
+            raise ValueError("Not a compiled lexer table (or an unsupported version)")
+        columns = []
+        for key in ("table", "accept"):
+            column = array('i')
+            column.frombytes(base64.b64decode(data[key]))
+            if data["byteorder"] != sys.byteorder:
+                column.byteswap()
+            columns.append(column)
+        return cls(data["name"], data["categories"], data["bounds"], *columns)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def _category(name):
+    """Accept TokenType values ("Keyword") or names ("KEYWORD")"""
+    for token_type in TokenType:
+        if name in (token_type.value, token_type.name):
+            return token_type.value
+    raise ValueError(f"Unknown token category {name!r}")
+
+
+def compile_language(definition):
+    """Compile a language definition dict into DFATables"""
+    rules = []  # (category value or None, AST)
+    for key, token_type in LITERAL_CATEGORIES:
+        words = sorted(set(definition.get(key, ())))
+        if words:
+            rules.append((token_type.value, ('alt', [_literal_node(word) for word in words])))
+    for category, pattern in definition.get("rules", ()):
+        rules.append((_category(category), RegexParser(pattern).parse()))
+    for pattern in definition.get("skip", ()):
+        rules.append((None, RegexParser(pattern).parse()))
+
+    nfa = _NFA()
+    start = nfa.state()
+    accepting = {}
+    for index, (_, node) in enumerate(rules):
+        rule_start, rule_end = nfa.build(node)
+        nfa.eps[start].append(rule_start)
+        accepting[rule_end] = index
+
+    # Split the code point space at every interval edge used by any rule
+    points = {0}
+    for edges in nfa.edges:
+        for intervals, _ in edges:
+            for lo, hi in intervals:
+                points.add(lo)
+                if hi < MAX_CODE_POINT:
+                    points.add(hi + 1)
+    bounds = sorted(points)
+    edges = [[(range(bisect_right(bounds, lo) - 1, bisect_right(bounds, hi)), target)
+              for intervals, target in state_edges for lo, hi in intervals]
+             for state_edges in nfa.edges]
+
+    # Subset construction
+    nclasses = len(bounds)
+    initial = nfa.closure([start])
+    states = {initial: 0}
+    worklist = [initial]
+    rows = []
+    accept = []
+    # States are numbered in discovery order, so processing the worklist
+    # front to back fills rows in state order
+    for current in worklist:
+        row = [-1] * nclasses
+        moves = {}
+        for nfa_state in current:
+            for classes, target in edges[nfa_state]:
+                for cls in classes:
+                    moves.setdefault(cls, set()).add(target)
+        for cls, targets in moves.items():
+            target_set = nfa.closure(targets)
+            if target_set not in states:
+                states[target_set] = len(states)
+                worklist.append(target_set)
+            row[cls] = states[target_set]
+        rows.append(row)
+        winners = [accepting[s] for s in current if s in accepting]
+        accept.append(min(winners) if winners else -1)
+
+    table = array('i')
+    for row in rows:
+        table.extend(row)
+    return DFATables(definition.get("name", ""), [category for category, _ in rules],
+                     bounds, table, array('i', accept))
+
+
+def definition_from_analyzer(analyzer, name="c++"):
+    """Language definition equivalent to a LexicalAnalyzer's token sets"""
+    return {
+        "name": name,
+        "keywords": sorted(analyzer.keywords),
+        "constants": sorted(analyzer.constants),
+        "operators": sorted(analyzer.operators),
+        "punctuations": sorted(analyzer.punctuations),
+        "special_chars": sorted(analyzer.special_chars),
+        "rules": [
+            ["Literal", r'"(\\.|[^"\\\n])*"'],
+            ["Literal", r"'(\\.|[^'\\\n])'"],
+            ["Literal", r'-?[0-9]+(\.[0-9]+)?([eE][+-]?[0-9]+)?[fFuUlL]*'],
+            ["Identifier", r'[a-zA-Z_][a-zA-Z0-9_]*'],
+        ],
+        "skip": [r'\s+', r'//[^\n]*', r'/\*([^*]|\*+[^*/])*\*+/'],
+    }
+
+
+def load_definition(path):
+    """Read a language definition from a .json or .toml file"""
+    if path.endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:
+            raise ImportError("TOML definitions need Python 3.11+ (tomllib)") from None
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path) as f:
+        return json.load(f)
+
+
+class DFALexer:
+    """Scan input with compiled DFATables"""
+    def __init__(self, tables):
+        if isinstance(tables, dict):
+            tables = compile_language(tables)
+        self.tables = tables
+        self.types = [TokenType(category) if category else None for category in tables.categories]
+
+    def scan(self, data, start=0, end=None):
+        """Yield (token_type, start, stop, line, line_start) with longest-match semantics.
+
+        data may be a str or any bytes-like object. Characters no rule can
+        start are grouped into one TokenType.ERROR lexeme per run.
+        """
+        tables = self.tables
+        table = tables.table
+        accept = tables.accept
+        nclasses = tables.nclasses
+        nstates = tables.nstates
+        ascii_classes = tables.ascii_classes
+        class_of = tables.class_of
+        types = self.types
+        is_text = isinstance(data, str)
+        newline = '\n' if is_text else b'\n'
+        if end is None:
+            end = len(data)
+
+        line = 1
+        line_start = start
+        error_start = -1
+        pos = start
+        # (position * nstates + state) pairs from which no rule can accept
+        failed = set()
+        while pos < end:
+            state = 0
+            rule = -1
+            stop = pos
+            index = pos
+            trail = []  # pairs visited since the last accepting state
+            while index < end:
+                code = ord(data[index]) if is_text else data[index]
+                state = table[state * nclasses + (ascii_classes[code] if code < 128 else class_of(code))]
+                if state < 0:
+                    break
+                index += 1
+                if accept[state] >= 0:
+                    rule = accept[state]
+                    stop = index
+                    trail = []
+                    continue
+                pair = index * nstates + state
+                if pair in failed:
+                    break
+                trail.append(pair)
+            failed.update(trail)
+
+            if rule < 0:
+                if error_start < 0:
+                    error_start = pos
+                pos += 1
+                continue
+            if error_start >= 0:
+                yield TokenType.ERROR, error_start, pos, line, line_start
+                # Newlines inside the error run still move the line count
+                newlines = data.count(newline, error_start, pos)
+                if newlines:
+                    line += newlines
+                    line_start = data.rfind(newline, error_start, pos) + 1
+                error_start = -1
+            if types[rule] is not None:
+                yield types[rule], pos, stop, line, line_start
+            newlines = data.count(newline, pos, stop)
+            if newlines:
+                line += newlines
+                line_start = data.rfind(newline, pos, stop) + 1
+            pos = stop
+
+        if error_start >= 0:
+            yield TokenType.ERROR, error_start, end, line, line_start
+
+    def tokenize(self, data):
+        """Yield Tokens; values from bytes-like input are decoded as UTF-8"""
+        for token_type, start, stop, line, line_start in self.scan(data):
+            value = data[start:stop]
+            if not isinstance(value, str):
+                value = bytes(value).decode('utf-8', 'replace')
+            yield Token(token_type, value, line, start - line_start + 1, start)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Compile a language definition into DFA lexer tables")
+    parser.add_argument("definition", help="JSON/TOML language definition, or 'builtin' for the C/C++ set")
+    parser.add_argument("output", help="where to write the compiled tables (JSON)")
+    args = parser.parse_args(argv)
+
+    if args.definition == "builtin":
+        definition = definition_from_analyzer(LexicalAnalyzer())
+    else:
+        definition = load_definition(args.definition)
+    tables = compile_language(definition)
+    tables.save(args.output)
+    print(f"{tables.nstates} states, {tables.nclasses} character classes -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+"""Cross-file inverted index of identifier, keyword and constant uses.
+
+    python lex_index.py build repo.lexidx src/ include/ --workers 8
+    python lex_index.py lookup repo.lexidx buffer_size
+    python lex_index.py lookup repo.lexidx goto --files
+    python lex_index.py lookup repo.lexidx buf --prefix
+
+Each distinct token value is interned once and maps to postings, which are
+flat array('I') runs of (file id, line, column). Running build again on an
+existing index only re-lexes files whose size or mtime changed and drops
+files that disappeared. A changed file gets a new file id, so postings stay
+ordered by file id and removing a file deletes one run per term. Once more
+than a quarter of the file ids belong to removed files, save() compacts
+the index first: live files are renumbered and unused terms dropped. Lookups
+are a dict probe plus a slice of the postings; prefix lookups bisect a
+sorted term list.
+
+On disk the index is a JSON header line, the NUL-separated terms, then the
+postings and per-file term lists as raw arrays with offset tables. Loading
+is a handful of frombytes() calls, and terms stay in that loaded form until
+an update touches them.
+"""
+import argparse
+import json
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+
+from lex_core import LexicalAnalyzer, TokenStore, TokenType
+from lex_batch import DEFAULT_INCLUDE, iter_source_files
+
+INDEX_VERSION = 1
+DEFAULT_TYPES = (TokenType.IDENTIFIER, TokenType.KEYWORD, TokenType.CONSTANT)
+COMPACT_RATIO = 0.25  # share of dead file ids at which save() compacts
+
+# Per-process analyzer for _read_file, created by _init_worker
+_analyzer = None
+
+
+def _init_worker(options):
+    global _analyzer
+    _analyzer = LexicalAnalyzer(**options)
+
+
+def store_postings(store, types=DEFAULT_TYPES):
+    """(values, lines, columns) of the tokens of the given types in a TokenStore"""
+    values = []
+    lines = array('I')
+    columns = array('I')
+    store_lines = store.lines.settle()
+    for token_type in types:
+        for index in store.positions[TokenStore.TYPE_CODES[token_type]].settle():
+            values.append(store.value(index))
+            lines.append(store_lines[index])
+            columns.append(store.columns[index])
+    return values, lines, columns
+
+
+def _read_file(path, types):
+    """Lex one file in a worker: (path, mtime_ns, size, postings, failure)"""
+    try:
+        status = os.stat(path)
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            code = f.read()
+    except OSError as e:
+        return path, None, None, None, str(e)
+    _analyzer.analyze(code)
+    return path, status.st_mtime_ns, status.st_size, store_postings(_analyzer.tokens, types), None
+
+
+class LexIndex:
+    def __init__(self, types=DEFAULT_TYPES):
+        self.types = tuple(types)
+        self.terms = []  # term id -> value
+        self.term_ids = {}  # value -> term id
+        self.files = []  # file id -> path, or None once removed
+        self.file_ids = {}  # path -> file id
+        self.file_stamps = []  # file id -> (mtime_ns, size)
+        # Postings and per-file term lists as loaded from disk, plus the
+        # ones changed since, which take precedence
+        self._base = array('I')
+        self._base_offsets = array('Q', [0])
+        self._postings = {}  # term id -> array('I') of (file, line, column)
+        self._base_file_terms = array('I')
+        self._base_file_offsets = array('Q', [0])
+        self._file_terms = {}  # file id -> array('I') of term ids
+        self._sorted_terms = None
+
+    # Postings
+
+    def _term_postings(self, term_id):
+        postings = self._postings.get(term_id)
+        if postings is None:
+            if term_id + 1 < len(self._base_offsets):
+                return self._base[self._base_offsets[term_id]:self._base_offsets[term_id + 1]]
+            return array('I')
+        return postings
+
+    def _mutable_postings(self, term_id):
+        postings = self._postings.get(term_id)
+        if postings is None:
+            postings = self._postings[term_id] = self._term_postings(term_id)
+        return postings
+
+    def _terms_of(self, file_id):
+        terms = self._file_terms.get(file_id)
+        if terms is None:
+            if file_id + 1 < len(self._base_file_offsets):
+                return self._base_file_terms[self._base_file_offsets[file_id]:self._base_file_offsets[file_id + 1]]
+            return array('I')
+        return terms
+
+    def _intern(self, value):
+        term_id = self.term_ids.get(value)
+        if term_id is None:
+            term_id = self.term_ids[sys.intern(value)] = len(self.terms)
+            self.terms.append(value)
+            self._sorted_terms = None
+        return term_id
+
+    # Updates
+
+    def add_file(self, path, values, lines, columns, stamp=(0, 0)):
+        """Index one file's token values and positions, replacing any earlier entry"""
+        self.remove_file(path)
+        file_id = self.file_ids[path] = len(self.files)
+        self.files.append(path)
+        self.file_stamps.append(stamp)
+        terms = set()
+        for value, line, column in zip(values, lines, columns):
+            term_id = self._intern(value)
+            self._mutable_postings(term_id).extend((file_id, line, column))
+            terms.add(term_id)
+        self._file_terms[file_id] = array('I', sorted(terms))
+
+    def add_store(self, path, store, stamp=(0, 0)):
+        """Index the tokens of an analyzer's TokenStore (e.g. analyzer.tokens)"""
+        self.add_file(path, *store_postings(store, self.types), stamp)
+
+    def remove_file(self, path):
+        file_id = self.file_ids.pop(path, None)
+        if file_id is None:
+            return
+        for term_id in self._terms_of(file_id):
+            postings = self._mutable_postings(term_id)
+            del postings[3 * _first_triple(postings, file_id):3 * _first_triple(postings, file_id + 1)]
+        self._file_terms[file_id] = array('I')
+        self.files[file_id] = None
+
+    def update(self, roots, include=DEFAULT_INCLUDE, exclude=(), workers=1, analyzer_options=None):
+        """Bring the index in line with the files under roots.
+
+        Only new files and files whose size or mtime changed are lexed;
+        indexed files under roots that no longer exist are dropped. Returns
+        (lexed, removed, failed) where failed maps paths to messages.
+        """
+        seen = set()
+        stale = []
+        for path in iter_source_files(roots, include, exclude):
+            seen.add(path)
+            try:
+                status = os.stat(path)
+            except OSError:
+                stale.append(path)
+                continue
+            file_id = self.file_ids.get(path)
+            if file_id is None or self.file_stamps[file_id] != (status.st_mtime_ns, status.st_size):
+                stale.append(path)
+
+        removed = 0
+        for path in list(self.file_ids):
+            if path not in seen and any(_under(path, root) for root in roots):
+                self.remove_file(path)
+                removed += 1
+
+        failed = {}
+        options = analyzer_options or {}
+        if workers == 1:
+            _init_worker(options)
+            results = (_read_file(path, self.types) for path in stale)
+            self._apply(results, failed)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(options,)) as executor:
+                results = executor.map(_read_file, stale, [self.types] * len(stale), chunksize=16)
+                self._apply(results, failed)
+        return len(stale) - len(failed), removed, failed
+
+    def _apply(self, results, failed):
+        for path, mtime_ns, size, postings, failure in results:
+            if failure is not None:
+                failed[path] = failure
+                self.remove_file(path)
+            else:
+                self.add_file(path, *postings, (mtime_ns, size))
+
+    # Lookups
+
+    def lookup(self, value):
+        """(path, line, column) of every indexed use of value"""
+        term_id = self.term_ids.get(value)
+        if term_id is None:
+            return []
+        postings = self._term_postings(term_id)
+        files = self.files
+        return [(files[postings[i]], postings[i + 1], postings[i + 2]) for i in range(0, len(postings), 3)]
+
+    def files_using(self, value):
+        """Paths of the files that use value, in indexing order"""
+        term_id = self.term_ids.get(value)
+        if term_id is None:
+            return []
+        postings = self._term_postings(term_id)
+        return [self.files[file_id] for file_id in dict.fromkeys(postings[0::3])]
+
+    def prefix(self, prefix, limit=100):
+        """Indexed values starting with prefix, in sorted order"""
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.term_ids)
+        terms = self._sorted_terms
+        found = []
+        for i in range(bisect_left(terms, prefix), len(terms)):
+            if len(found) >= limit or not terms[i].startswith(prefix):
+                break
+            if self._term_postings(self.term_ids[terms[i]]):
+                found.append(terms[i])
+        return found
+
+    def __len__(self):
+        return len(self.file_ids)
+
+    # Storage
+
+    def compact(self):
+        """Renumber the live files and drop terms no file uses any more.
+
+        Both renumberings keep the old order, so postings stay ordered by
+        file id and per-file term lists stay sorted.
+        """
+        file_map = array('I', [0]) * len(self.files)
+        files = []
+        file_stamps = []
+        for file_id, path in enumerate(self.files):
+            if path is not None:
+                file_map[file_id] = len(files)
+                files.append(path)
+                file_stamps.append(self.file_stamps[file_id])
+
+        term_map = array('I', [0]) * len(self.terms)
+        terms = []
+        postings = array('I')
+        offsets = array('Q', [0])
+        for term_id, value in enumerate(self.terms):
+            run = self._term_postings(term_id)
+            if not run:
+                continue
+            term_map[term_id] = len(terms)
+            terms.append(value)
+            start = len(postings)
+            postings.extend(run)
+            postings[start::3] = array('I', map(file_map.__getitem__, run[0::3]))
+            offsets.append(len(postings))
+
+        file_terms = array('I')
+        file_offsets = array('Q', [0])
+        for file_id, path in enumerate(self.files):
+            if path is not None:
+                file_terms.extend(map(term_map.__getitem__, self._terms_of(file_id)))
+                file_offsets.append(len(file_terms))
+
+        self.files = files
+        self.file_stamps = file_stamps
+        self.file_ids = {path: file_id for file_id, path in enumerate(files)}
+        self.terms = terms
+        self.term_ids = {value: term_id for term_id, value in enumerate(terms)}
+        self._base, self._base_offsets = postings, offsets
+        self._base_file_terms, self._base_file_offsets = file_terms, file_offsets
+        self._postings = {}
+        self._file_terms = {}
+        self._sorted_terms = None
+
+    def save(self, path):
+        if len(self.files) - len(self.file_ids) > COMPACT_RATIO * len(self.files):
+            self.compact()
+        postings = array('I')
+        offsets = array('Q', [0])
+        for term_id in range(len(self.terms)):
+            postings.extend(self._term_postings(term_id))
+            offsets.append(len(postings))
+        file_terms = array('I')
+        file_offsets = array('Q', [0])
+        for file_id in range(len(self.files)):
+            file_terms.extend(self._terms_of(file_id))
+            file_offsets.append(len(file_terms))
+        terms = "\0".join(self.terms).encode('utf-8')
+        columns = (offsets, postings, file_offsets, file_terms)
+        header = {
+            "version": INDEX_VERSION,
+            "byteorder": sys.byteorder,
+            "types": [token_type.value for token_type in self.types],
+            "files": [[path, *stamp] if path is not None else None
+                      for path, stamp in zip(self.files, self.file_stamps)],
+            "terms_size": len(terms),
+            "terms": len(self.terms),
+            "lengths": [len(column) for column in columns],
+        }
+        tmp = path + ".tmp"
+        with open(tmp, 'wb') as f:
+            f.write(json.dumps(header).encode('utf-8') + b"\n")
+            f.write(terms)
+            for column in columns:
+                column.tofile(f)
+        os.replace(tmp, path)
+        # What was saved becomes the new loaded base
+        self._base, self._base_offsets = postings, offsets
+        self._base_file_terms, self._base_file_offsets = file_terms, file_offsets
+        self._postings = {}
+        self._file_terms = {}
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline())
+            if header.get("version") != INDEX_VERSION:
+                raise ValueError(f"Unsupported index version: {header.get('version')}")
+            by_value = {token_type.value: token_type for token_type in TokenType}
+            index = cls([by_value[name] for name in header["types"]])
+            terms = f.read(header["terms_size"]).decode('utf-8')
+            index.terms = terms.split("\0") if header["terms"] else []
+            index.term_ids = {sys.intern(value): term_id for term_id, value in enumerate(index.terms)}
+            for entry in header["files"]:
+                if entry is None:
+                    index.files.append(None)
+                    index.file_stamps.append((0, 0))
+                else:
+                    index.file_ids[entry[0]] = len(index.files)
+                    index.files.append(entry[0])
+                    index.file_stamps.append((entry[1], entry[2]))
+            columns = (array('Q'), array('I'), array('Q'), array('I'))
+            for column, length in zip(columns, header["lengths"]):
+                column.fromfile(f, length)
+                if header["byteorder"] != sys.byteorder:
+                    column.byteswap()
+        index._base_offsets, index._base, index._base_file_offsets, index._base_file_terms = columns
+        return index
+
+
+def _first_triple(postings, file_id):
+    """Index of the first (file, line, column) triple with a file id >= file_id.
+
+    File ids only grow as files are added, so every term's postings are
+    ordered by file id and one file's entries are a contiguous run.
+    """
+    lo, hi = 0, len(postings) // 3
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if postings[3 * mid] < file_id:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _under(path, root):
+    if os.path.isfile(root):
+        return path == root
+    return path.startswith(os.path.join(root, ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query a cross-file token index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="create or incrementally update an index")
+    build.add_argument("index", help="index file")
+    build.add_argument("roots", nargs="+", help="files or directories to index")
+    build.add_argument("--include", nargs="+", default=list(DEFAULT_INCLUDE))
+    build.add_argument("--exclude", nargs="+", default=[])
+    build.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    lookup = commands.add_parser("lookup", help="find uses of a token value")
+    lookup.add_argument("index", help="index file")
+    lookup.add_argument("value")
+    lookup.add_argument("--prefix", action="store_true", help="list indexed values starting with value")
+    lookup.add_argument("--files", action="store_true", help="only list the files that use value")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        index = LexIndex.load(args.index) if os.path.exists(args.index) else LexIndex()
+        lexed, removed, failed = index.update(args.roots, args.include, args.exclude, args.workers)
+        index.save(args.index)
+        print(f"Indexed {len(index)} files ({lexed} lexed, {removed} removed), {len(index.terms)} terms")
+        for path, failure in failed.items():
+            print(f"Failed: {path}: {failure}", file=sys.stderr)
+        return 1 if failed else 0
+
+    index = LexIndex.load(args.index)
+    if args.prefix:
+        for value in index.prefix(args.value):
+            print(value)
+    elif args.files:
+        for path in index.files_using(args.value):
+            print(path)
+    else:
+        for path, line, column in index.lookup(args.value):
+            print(f"{path}:{line}:{column}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
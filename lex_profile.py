@@ -0,0 +1,224 @@
+"""Per-pattern profiling of the analyzer's scanner.
+
+    profiler = LexProfiler(slowest=10, on_line=print)
+    analyzer.profiler = profiler
+    analyzer.analyze(code)
+    analyzer.profiler = None
+    print(json.dumps(profiler.report(), indent=2))
+
+or from the shell: python lex_profile.py source.cpp --engine master
+
+While analyzer.profiler is None the scanner runs its uninstrumented
+matchers. A profiler records, for each entry in analyzer.patterns, how often
+it was tried and matched and the time spent in it. It also keeps the time
+per line, the time in error recovery (the resync search after a bad
+character) and the slowest lines. With the master engine all patterns are
+tried in one regex call, so attempts and time are charged to the pattern
+that won, or to "no match".
+"""
+import argparse
+import heapq
+import json
+import re
+import sys
+from time import perf_counter
+
+from lex_core import LexicalAnalyzer
+
+SNIPPET_LENGTH = 80
+
+
+class PatternStats:
+    __slots__ = ("name", "token_type", "pattern", "attempts", "hits", "seconds")
+
+    def __init__(self, name, token_type, pattern):
+        self.name = name
+        self.token_type = token_type
+        self.pattern = pattern
+        self.attempts = 0
+        self.hits = 0
+        self.seconds = 0.0
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "type": self.token_type.value if self.token_type else None,
+            "pattern": self.pattern,
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "seconds": self.seconds,
+        }
+
+
+class LexProfiler:
+    """Counters filled in by LexicalAnalyzer._scan while attached as analyzer.profiler.
+
+    on_line, if given, is called as on_line(line_number, seconds) after
+    every line. Line times are wall time between the start and end of the
+    line, so they include whatever the caller does with each token.
+    """
+    def __init__(self, slowest=10, on_line=None):
+        self.slowest = slowest
+        self.on_line = on_line
+        self.reset()
+
+    def reset(self):
+        self.patterns = {}  # name -> PatternStats
+        self.engine = None
+        self.lines = 0
+        self.line_seconds = 0.0
+        self.resyncs = 0
+        self.resync_seconds = 0.0
+        self._slowest = []  # min-heap of (seconds, line_number, snippet)
+
+    def _stats(self, name, token_type, pattern):
+        stats = self.patterns.get(name)
+        if stats is None:
+            stats = self.patterns[name] = PatternStats(name, token_type, pattern)
+        return stats
+
+    def instrument(self, analyzer, regexes, match_token, resync):
+        """Return timed versions of the scanner's token matcher and resync search"""
+        self.engine = analyzer.engine
+        if analyzer.engine == "master":
+            match_token = self._master_matcher(regexes)
+        else:
+            match_token = self._sequential_matcher(regexes)
+
+        def timed_resync(text, pos, eol):
+            began = perf_counter()
+            found = resync(text, pos, eol)
+            self.resync_seconds += perf_counter() - began
+            self.resyncs += 1
+            return found
+        return match_token, timed_resync
+
+    def _sequential_matcher(self, regexes):
+        # Same order as LexicalAnalyzer._matcher: ignore patterns, then tokens.
+        # Patterns are named like the master regex groups (IGNORE_0, ...), so
+        # both engines report under the same names. Each ignore pattern is
+        # timed on its own; trying them in order picks the same one as the
+        # combined ignore regex.
+        as_bytes = not isinstance(regexes["ignore"].pattern, str)
+        entries = []
+        for name, token_type in regexes["group_types"].items():
+            if token_type is None:
+                pattern = regexes["group_patterns"][name]
+                regex = re.compile(pattern.encode('utf-8') if as_bytes else pattern)
+                entries.append((None, regex.match, self._stats(name, None, pattern)))
+        for index, (token_type, regex) in enumerate(regexes["patterns"], len(entries)):
+            name = f"{token_type.name}_{index}"
+            entries.append((token_type, regex.match, self._stats(name, token_type, _pattern_text(regex))))
+
+        def match_sequential(text, pos, eol):
+            for token_type, regex_match, stats in entries:
+                began = perf_counter()
+                match = regex_match(text, pos, eol)
+                stats.seconds += perf_counter() - began
+                stats.attempts += 1
+                if match:
+                    stats.hits += 1
+                    return token_type, match.end()
+            return None
+        return match_sequential
+
+    def _master_matcher(self, regexes):
+        master = regexes["master"].match
+        group_types = regexes["group_types"]
+        stats_by_group = {name: self._stats(name, token_type, regexes["group_patterns"][name])
+                          for name, token_type in group_types.items()}
+        missed = self._stats("no match", None, "")
+
+        def match_master(text, pos, eol):
+            began = perf_counter()
+            match = master(text, pos, eol)
+            stats = stats_by_group[match.lastgroup] if match else missed
+            stats.seconds += perf_counter() - began
+            stats.attempts += 1
+            if match:
+                stats.hits += 1
+                return group_types[match.lastgroup], match.end()
+            return None
+        return match_master
+
+    def line(self, line_number, seconds, text, line_start, eol):
+        """Record one scanned line"""
+        self.lines += 1
+        self.line_seconds += seconds
+        slowest = self._slowest
+        if len(slowest) < self.slowest or (slowest and seconds > slowest[0][0]):
+            snippet = text[line_start:min(eol, line_start + SNIPPET_LENGTH)]
+            if not isinstance(snippet, str):
+                snippet = snippet.decode('utf-8', 'replace')
+            entry = (seconds, line_number, snippet)
+            if len(slowest) < self.slowest:
+                heapq.heappush(slowest, entry)
+            else:
+                heapq.heapreplace(slowest, entry)
+        if self.on_line is not None:
+            self.on_line(line_number, seconds)
+
+    def report(self):
+        """Everything recorded so far as plain data, patterns sorted by time spent"""
+        patterns = sorted(self.patterns.values(), key=lambda stats: stats.seconds, reverse=True)
+        return {
+            "engine": self.engine,
+            "lines": self.lines,
+            "line_seconds": self.line_seconds,
+            "mean_line_seconds": self.line_seconds / self.lines if self.lines else 0.0,
+            "resyncs": self.resyncs,
+            "resync_seconds": self.resync_seconds,
+            "patterns": [stats.to_dict() for stats in patterns],
+            "slowest_lines": [{"line": line_number, "seconds": seconds, "text": snippet}
+                              for seconds, line_number, snippet in sorted(self._slowest, reverse=True)],
+        }
+
+
+def _pattern_text(regex):
+    pattern = regex.pattern
+    return pattern if isinstance(pattern, str) else pattern.decode('utf-8')
+
+
+def profile(analyzer, code, slowest=10, on_line=None, **analyze_options):
+    """Analyze code with a fresh profiler attached and return its report"""
+    profiler = LexProfiler(slowest, on_line)
+    previous = analyzer.profiler
+    analyzer.profiler = profiler
+    try:
+        analyzer.analyze(code, **analyze_options)
+    finally:
+        analyzer.profiler = previous
+    return profiler.report()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the lexical analyzer on a source file")
+    parser.add_argument("file")
+    parser.add_argument("--engine", choices=LexicalAnalyzer.ENGINES, default="sequential")
+    parser.add_argument("--classify", choices=LexicalAnalyzer.CLASSIFY_MODES, default="regex")
+    parser.add_argument("--recovery", choices=LexicalAnalyzer.RECOVERY_POLICIES, default="symbol")
+    parser.add_argument("--slowest", type=int, default=10, help="how many of the slowest lines to keep")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.file, 'r', encoding='utf-8', errors='replace') as f:
+        code = f.read()
+    analyzer = LexicalAnalyzer(engine=args.engine, classify=args.classify, recovery=args.recovery)
+    report = profile(analyzer, code, args.slowest)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"Lines: {report['lines']}, {report['line_seconds'] * 1000:.1f} ms")
+    print(f"Error recovery: {report['resyncs']} resyncs, {report['resync_seconds'] * 1000:.1f} ms")
+    print(f"\n{'Pattern':<16}{'Attempts':>10}{'Hits':>10}{'ms':>10}")
+    for stats in report["patterns"]:
+        print(f"{stats['name']:<16}{stats['attempts']:>10}{stats['hits']:>10}{stats['seconds'] * 1000:>10.1f}")
+    print("\nSlowest lines:")
+    for entry in report["slowest_lines"]:
+        print(f"{entry['line']:>8}  {entry['seconds'] * 1e6:8.1f} us  {entry['text']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
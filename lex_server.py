@@ -0,0 +1,406 @@
+"""Local lexing server with a pool of warm analyzers in worker processes.
+
+    python lex_server.py --socket /tmp/lex.sock --workers 4
+    python lex_server.py --port 8765          # 127.0.0.1 only
+
+Clients send one JSON object per line and get one JSON line back per
+request, matched by "id". Requests on one connection may be answered out
+of order.
+
+    {"id": 1, "op": "lex", "source": "int x;", "engine": "master", "multiline_comments": false}
+    {"id": 2, "op": "metrics"}
+    {"id": 3, "op": "ping"}
+
+A lex reply carries the token and error TokenStores in their compact
+to_bytes() form, base64-encoded. lex(source) in this module turns them back
+into TokenStores over the caller's own copy of the source; values are never
+sent. With "format": "columns" the reply has plain integer lists instead.
+
+Worker processes start once and keep an analyzer per option set, so
+requests skip interpreter startup, imports and pattern compilation. At most
+max_pending requests are in flight: once that many are queued the server
+stops reading from clients, and the socket pushes back. Queued requests
+are collected in batches of up to batch_size, waiting at most batch_delay
+seconds to fill one, and each batch is split evenly across the workers. If
+a worker process dies, the requests it held get an error reply and the
+pool is replaced. Where available, workers start from a fork server, so as
+with the spawn start method, scripts that create a LexServer need an
+if __name__ == "__main__" guard.
+"""
+import argparse
+import asyncio
+import base64
+import collections
+import json
+import multiprocessing
+import os
+import socket
+import stat
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from lex_core import LexicalAnalyzer, TokenStore
+
+ANALYZER_OPTIONS = ("engine", "recovery", "classify")
+LATENCY_WINDOW = 4096  # recent request latencies kept for percentiles
+SHUTDOWN_MESSAGE = "server is shutting down"
+
+# Warm analyzers of a worker process, keyed by their constructor options
+_analyzers = {}
+
+
+def _analyzer_for(options):
+    key = tuple(sorted(options.items()))
+    analyzer = _analyzers.get(key)
+    if analyzer is None:
+        analyzer = _analyzers[key] = LexicalAnalyzer(**options)
+    return analyzer
+
+
+def _init_worker():
+    _analyzer_for({})  # build the default pattern tables before any request arrives
+
+
+def _lex_batch(jobs):
+    """Lex (source, options, multiline_comments) jobs in a worker.
+
+    Returns (tokens_bytes, errors_bytes, count) per job, count being the
+    number of tokens plus errors, or an error message string when the
+    options are invalid.
+    """
+    results = []
+    for source, options, multiline_comments in jobs:
+        try:
+            analyzer = _analyzer_for(options)
+        except (TypeError, ValueError) as e:
+            results.append(str(e))
+            continue
+        analyzer.analyze(source, multiline_comments)
+        results.append((analyzer.tokens.to_bytes(), analyzer.errors.to_bytes(),
+                        len(analyzer.tokens) + len(analyzer.errors)))
+    return results
+
+
+class Metrics:
+    """Counters and recent latencies for the metrics op"""
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.failed = 0
+        self.bytes_in = 0
+        self.tokens_out = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.in_flight = 0
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def to_dict(self, queued):
+        uptime = time.monotonic() - self.started
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else None
+
+        return {
+            "uptime_seconds": uptime,
+            "requests": self.requests,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "queued": queued,
+            "requests_per_second": self.requests / uptime if uptime else 0.0,
+            "bytes_in": self.bytes_in,
+            "tokens_out": self.tokens_out,
+            "batches": self.batches,
+            "mean_batch_size": self.batched_requests / self.batches if self.batches else 0.0,
+            "latency_seconds": {"p50": percentile(0.5), "p95": percentile(0.95),
+                                "p99": percentile(0.99), "max": latencies[-1] if latencies else None},
+        }
+
+
+class LexServer:
+    def __init__(self, workers=None, max_pending=256, batch_size=32, batch_delay=0.002):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.metrics = Metrics()
+        self.executor = None
+        self.queue = None
+        self.slots = None
+        self._batcher = None
+        self._submits = set()  # running _submit tasks, kept so they are not collected
+
+    def _new_executor(self):
+        # Workers may start while clients are connected (lazily, or after a
+        # crash). Forked straight from the server they would inherit the
+        # client sockets and keep them open after the client closes, so they
+        # come from a fork server started before any connection instead.
+        context = None
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, mp_context=context)
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.executor = self._new_executor()
+        # Start every worker now so the first requests do not pay for it
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _lex_batch, [])
+                               for _ in range(self.workers)))
+        self.queue = asyncio.Queue()
+        self.slots = asyncio.Semaphore(self.max_pending)
+        self._batcher = asyncio.create_task(self._run_batches())
+
+    async def close(self):
+        """Stop batching, answer every unanswered request with an error and stop the pool"""
+        if self._batcher is not None:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+        if self.queue is not None:
+            while not self.queue.empty():
+                _fail([self.queue.get_nowait()], SHUTDOWN_MESSAGE)
+        for task in list(self._submits):
+            task.cancel()
+        await asyncio.gather(*self._submits, return_exceptions=True)
+        if self.executor is not None:
+            # Do not block the event loop waiting for workers to finish
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_delay
+            try:
+                while len(batch) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                _fail(batch, SHUTDOWN_MESSAGE)
+                raise
+            self.metrics.batches += 1
+            self.metrics.batched_requests += len(batch)
+            task = asyncio.create_task(self._submit(batch))
+            self._submits.add(task)
+            task.add_done_callback(self._submits.discard)
+
+    async def _submit(self, batch):
+        # One chunk per worker, so a batch keeps every worker busy
+        size = -(-len(batch) // self.workers)
+        await asyncio.gather(*(self._run_chunk(self.executor, batch[i:i + size])
+                               for i in range(0, len(batch), size)))
+
+    async def _run_chunk(self, executor, chunk):
+        loop = asyncio.get_running_loop()
+        jobs = [job for job, future in chunk]
+        try:
+            results = await loop.run_in_executor(executor, _lex_batch, jobs)
+        except asyncio.CancelledError:
+            _fail(chunk, SHUTDOWN_MESSAGE)
+            raise
+        except BrokenProcessPool as e:
+            self._replace_executor(executor)
+            results = [f"worker failed: {e}"] * len(chunk)
+        except Exception as e:
+            results = [f"worker failed: {e}"] * len(chunk)
+        for (job, future), result in zip(chunk, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _replace_executor(self, broken):
+        """Swap in a fresh pool after a worker died; a broken pool never recovers"""
+        if self.executor is broken:
+            self.executor = self._new_executor()
+            broken.shutdown(wait=False)
+
+    async def lex(self, source, options=None, multiline_comments=False):
+        """Lex through the pool; returns a _lex_batch() result"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(((source, options or {}, multiline_comments), future))
+        return await future
+
+    async def handle(self, request):
+        """Answer one decoded request"""
+        op = request.get("op", "lex")
+        reply = {"id": request.get("id")}
+        if op == "ping":
+            reply["ok"] = True
+            return reply
+        if op == "metrics":
+            reply["metrics"] = self.metrics.to_dict(self.queue.qsize())
+            return reply
+        if op != "lex":
+            reply["error"] = f"Unknown op '{op}'"
+            return reply
+
+        source = request.get("source")
+        if not isinstance(source, str):
+            reply["error"] = "lex needs a 'source' string"
+            return reply
+        options = {name: request[name] for name in ANALYZER_OPTIONS if name in request}
+        result = await self.lex(source, options, bool(request.get("multiline_comments")))
+        if isinstance(result, str):
+            reply["error"] = result
+            return reply
+
+        tokens_bytes, errors_bytes, count = result
+        self.metrics.tokens_out += count
+        if request.get("format") == "columns":
+            tokens = TokenStore.from_bytes(tokens_bytes, source)
+            errors = TokenStore.from_bytes(errors_bytes, source)
+            reply["types"] = [token_type.value for token_type in TokenStore.TYPES]
+            reply["tokens"] = _columns(tokens)
+            reply["errors"] = _columns(errors)
+        else:
+            reply["tokens"] = base64.b64encode(tokens_bytes).decode('ascii')
+            reply["errors"] = base64.b64encode(errors_bytes).decode('ascii')
+        return reply
+
+    async def _answer(self, line, writer, lock):
+        began = time.monotonic()
+        self.metrics.in_flight += 1
+        try:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as e:
+                reply = {"id": None, "error": f"Bad request: {e}"}
+            else:
+                try:
+                    reply = await self.handle(request)
+                except Exception as e:
+                    # Always answer, or the client waits on this id forever
+                    reply = {"id": request.get("id"), "error": f"Internal error: {e}"}
+            if "error" in reply:
+                self.metrics.failed += 1
+            data = json.dumps(reply, separators=(",", ":")).encode('utf-8') + b"\n"
+            async with lock:
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.metrics.in_flight -= 1
+            self.metrics.requests += 1
+            self.metrics.latencies.append(time.monotonic() - began)
+            self.slots.release()
+
+    async def serve_client(self, reader, writer):
+        lock = asyncio.Lock()  # replies from concurrent requests must not interleave
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # Backpressure: stop reading while max_pending requests are in flight
+                await self.slots.acquire()
+                self.metrics.bytes_in += len(line)
+                task = asyncio.create_task(self._answer(line, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+
+def _fail(items, message):
+    """Answer queued (job, future) items with an error message"""
+    for job, future in items:
+        if not future.done():
+            future.set_result(message)
+
+
+def _columns(store):
+    starts, lengths, lines, columns = store.starts.settle(), store.lengths, store.lines.settle(), store.columns
+    return {"type": store.types.tolist(), "offset": starts.tolist(), "length": lengths.tolist(),
+            "line": lines.tolist(), "column": columns.tolist()}
+
+
+async def serve(path=None, port=None, host="127.0.0.1", ready=None, **server_options):
+    """Run a LexServer on a Unix socket path or a localhost TCP port until cancelled"""
+    server = LexServer(**server_options)
+    await server.start()
+    try:
+        if path is not None:
+            _remove_stale_socket(path)
+            listener = await asyncio.start_unix_server(server.serve_client, path=path, limit=2 ** 26)
+        else:
+            listener = await asyncio.start_server(server.serve_client, host=host, port=port, limit=2 ** 26)
+        async with listener:
+            if ready is not None:
+                ready.set()
+            await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+def _remove_stale_socket(path):
+    """Unlink a socket left by an earlier server; refuse to touch anything else"""
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a socket")
+    os.remove(path)
+
+
+def _connect(address):
+    if isinstance(address, str):
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    client.connect(address)
+    return client
+
+
+def request(address, payload):
+    """Send one request to a server at address (socket path or (host, port)) and return the reply"""
+    with _connect(address) as client, client.makefile('rwb') as stream:
+        stream.write(json.dumps(payload).encode('utf-8') + b"\n")
+        stream.flush()
+        return json.loads(stream.readline())
+
+
+def lex(address, source, **options):
+    """Lex source on a server and return (tokens, errors) TokenStores over source"""
+    reply = request(address, dict(options, op="lex", source=source))
+    if "error" in reply:
+        raise ValueError(reply["error"])
+    return (TokenStore.from_bytes(base64.b64decode(reply["tokens"]), source),
+            TokenStore.from_bytes(base64.b64decode(reply["errors"]), source))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve lexing requests from warm worker processes")
+    where = parser.add_mutually_exclusive_group(required=True)
+    where.add_argument("--socket", help="Unix socket path to listen on")
+    where.add_argument("--port", type=int, help="TCP port to listen on (127.0.0.1 only)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--max-pending", type=int, default=256, help="requests in flight before reading pauses")
+    parser.add_argument("--batch-size", type=int, default=32, help="requests sent to a worker at once")
+    parser.add_argument("--batch-delay", type=float, default=0.002, help="seconds to wait to fill a batch")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.socket, args.port, workers=args.workers, max_pending=args.max_pending,
+                          batch_size=args.batch_size, batch_delay=args.batch_delay))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"lex_server: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
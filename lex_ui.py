@@ -0,0 +1,165 @@
+"""Colorized console rendering for the analyzer (colorama).
+
+Imported by the interactive program and, on first use, by
+LexicalAnalyzer.display_tokens_table()/display_errors_table(); lex_core
+itself never imports it.
+"""
+import os
+import sys
+from colorama import init, Fore, Back, Style
+
+from lex_core import TokenType
+
+# Initialize colorama
+init(autoreset=True)
+
+# Color mapping for token types
+TOKEN_COLORS = {
+    TokenType.KEYWORD: Fore.GREEN,
+    TokenType.IDENTIFIER: Fore.CYAN,
+    TokenType.OPERATOR: Fore.MAGENTA,
+    TokenType.LITERAL: Fore.YELLOW,
+    TokenType.PUNCTUATION: Fore.BLUE,
+    TokenType.SPECIAL_CHAR: Fore.WHITE,
+    TokenType.CONSTANT: Fore.LIGHTYELLOW_EX,
+    TokenType.ERROR: Fore.RED
+}
+
+def clear_screen():
+    """Clear the console screen"""
+    os.system('cls' if os.name == 'nt' else 'clear')
+
+def print_header(title, color=Fore.CYAN):
+    """Print a simple header"""
+    print(color + Style.BRIGHT + f"\n{'=' * 50}")
+    print(f"{title.upper()}".center(50))
+    print(f"{'=' * 50}\n")
+
+def format_token(token):
+    """Colored one-line form of a token"""
+    color = TOKEN_COLORS.get(token.type, Fore.WHITE)
+    return f"{color}{token.type.value}: {token.value} (Line {Style.BRIGHT}{token.line_number}{Style.NORMAL})"
+
+def token_row(token):
+    color = TOKEN_COLORS.get(token.type, Fore.WHITE)
+    return [
+        color + token.type.value,
+        color + token.value,
+        Style.BRIGHT + str(token.line_number)
+    ]
+
+# Rows per page and how many leading tokens are measured for column widths
+PAGE_SIZE = 40
+SAMPLE_SIZE = 1000
+MAX_VALUE_WIDTH = 60
+
+def column_widths(tokens, headers, sample_size=SAMPLE_SIZE, max_value_width=MAX_VALUE_WIDTH):
+    """Fixed Type/Value/Line widths, measured on the first sample_size tokens only.
+    
+    Type names come from a fixed set and tokens are in line order, so only
+    the value width is estimated; longer values are cut when rendered.
+    """
+    count = len(tokens)
+    type_width = max([len(headers[0])] + [len(token_type.value) for token_type in TokenType])
+    value_width = max([len(headers[1])] + [len(tokens[i].value) for i in range(min(count, sample_size))])
+    line_width = max(len(headers[2]), len(str(tokens[count - 1].line_number)) if count else 0)
+    return type_width, min(value_width, max(max_value_width, len(headers[1]))), line_width
+
+def table_rule(widths, fill="-"):
+    return "+" + "+".join(fill * (width + 2) for width in widths) + "+"
+
+def table_header(headers, widths, color=Fore.WHITE):
+    cells = " | ".join(color + Style.BRIGHT + f"{header:<{width}}" + Style.RESET_ALL
+                       for header, width in zip(headers, widths))
+    return [table_rule(widths), f"| {cells} |", table_rule(widths, "=")]
+
+def table_row(token, widths):
+    """One fixed-width colored row; values wider than the column are cut"""
+    type_width, value_width, line_width = widths
+    color = TOKEN_COLORS.get(token.type, Fore.WHITE)
+    value = token.value.replace("\t", " ")
+    if len(value) > value_width:
+        value = value[:value_width - 3] + "..."
+    return (f"| {color}{token.type.value:<{type_width}}{Style.RESET_ALL} "
+            f"| {color}{value:<{value_width}}{Style.RESET_ALL} "
+            f"| {Style.BRIGHT}{token.line_number:>{line_width}}{Style.RESET_ALL} |")
+
+def page_table(tokens, headers, page_size=PAGE_SIZE, widths=None, interactive=None, color=Fore.WHITE):
+    """Print tokens as a fixed-width table, page_size rows at a time.
+    
+    tokens can be a TokenStore, a TokenView from get_tokens_by_type() or a
+    list; rows are only built for the page being shown. Interactively the
+    user pages with Enter/b/q or a page number; otherwise (stdin or stdout
+    not a terminal) every page is written straight through.
+    """
+    if interactive is None:
+        interactive = sys.stdin.isatty() and sys.stdout.isatty()
+    if widths is None:
+        widths = column_widths(tokens, headers)
+    header = table_header(headers, widths, color)
+    count = len(tokens)
+    pages = max(1, -(-count // page_size))
+    
+    if not interactive:
+        print("\n".join(header))
+        for start in range(0, count, page_size):
+            rows = [table_row(tokens[i], widths) for i in range(start, min(start + page_size, count))]
+            sys.stdout.write("\n".join(rows) + "\n")
+        print(table_rule(widths))
+        return
+    
+    page = 0
+    while True:
+        start = page * page_size
+        stop = min(start + page_size, count)
+        print("\n".join(header))
+        print("\n".join(table_row(tokens[i], widths) for i in range(start, stop)))
+        print(table_rule(widths))
+        print(Fore.CYAN + f"Rows {start + 1}-{stop} of {count} (page {page + 1}/{pages})")
+        if pages == 1:
+            return
+        choice = input(Fore.YELLOW + "[Enter] next, [b] back, [number] go to page, [q] stop: " + Fore.WHITE).strip().lower()
+        if choice == "q" or (not choice and page == pages - 1):
+            return
+        if choice == "b":
+            page = max(page - 1, 0)
+        elif choice.isdigit():
+            page = min(max(int(choice) - 1, 0), pages - 1)
+        else:
+            page = min(page + 1, pages - 1)
+
+def display_tokens_table(analyzer, tokens=None, page_size=PAGE_SIZE):
+    clear_screen()
+    if tokens is None:
+        tokens = analyzer.tokens
+    
+    print_header("Token Analysis Results")
+    
+    if not tokens:
+        print(Fore.YELLOW + "No tokens to display.")
+        return
+    
+    # Display token counts
+    counts = analyzer.get_token_counts()
+    print(Fore.CYAN + Style.BRIGHT + "\nTOKEN COUNTS:")
+    for token_type, count in counts.items():
+        if token_type == "Total":
+            print(Fore.WHITE + f"{token_type}: {Fore.CYAN}{count}")
+        else:
+            color = next((v for k, v in TOKEN_COLORS.items() if k.value == token_type), Fore.WHITE)
+            print(f"{color}{token_type}: {Fore.WHITE}{count}")
+    
+    # Display token details
+    print(Fore.CYAN + Style.BRIGHT + "\nTOKEN DETAILS:")
+    page_table(tokens, ("Type", "Value", "Line"), page_size)
+
+def display_errors_table(analyzer, page_size=PAGE_SIZE):
+    clear_screen()
+    print_header("Error Analysis")
+    
+    if not analyzer.errors:
+        print(Fore.GREEN + "No errors found!")
+        return
+    
+    print(Fore.RED + Style.BRIGHT + f"Total Errors: {len(analyzer.errors)}\n")
+    page_table(analyzer.errors, ("Error Type", "Invalid Token", "Line"), page_size, color=Fore.RED)
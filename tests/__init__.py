@@ -0,0 +1,27 @@
+"""Differential tests: each fast path is checked against a slower, simpler one.
+
+Run with python -m unittest (or pytest) from the repository root.
+"""
+import random
+
+# Fragments random sources are built from: every token type, comments,
+# unterminated strings and comments, odd whitespace and non-ASCII text
+PIECES = ['int', 'float', 'x', 'y1', '_z', 'NULL', 'PI', 'nullptr', 'cout', '<<', '>>=', '->*', '::', '.*',
+          '+', '-', '-1', '3.14', '1e10', '10f', '42', '1.5e', '"str"', '"esc\\"q"', "'a'", "'\\n'", "'ab'",
+          '"unterminated', "'", '//c', '/* c */', '/*', '*/', '@', '$', '`', '\\', '#', '?', ':', ';', '{', '}',
+          '(', ')', '[', ']', ',', '.', 'ñame', 'é', '€', ' ', '  ', '\t', '\x0c', '\n', '\n', '\r\n',
+          '\xa0', '1int', 'intx', '10abc', '==', '!=', '&&', '||', '~', '^', '%', 'goto', 'TRUE', 'true',
+          '"a\tb"', 'a"b', '0x1F']
+
+
+def random_source(rng, pieces=12):
+    return ''.join(rng.choice(PIECES) for _ in range(rng.randint(0, pieces)))
+
+
+def random_sources(count, seed, pieces=60):
+    rng = random.Random(seed)
+    return [random_source(rng, pieces) for _ in range(count)]
+
+
+def token_rows(store):
+    return [(token.type, token.value, token.line_number, token.column, token.offset) for token in store]
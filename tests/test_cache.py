@@ -0,0 +1,77 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from lex_cache import LexCache
+from lex_core import LexicalAnalyzer
+from tests import token_rows
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CODE = "int main() {\n  return NULL + x; // done\n}\n@ \"str\"\n"
+
+
+def run_with_hash_seed(seed, script, *args):
+    """Run a Python snippet in a fresh interpreter with a fixed string hash seed"""
+    env = dict(os.environ, PYTHONHASHSEED=str(seed))
+    result = subprocess.run([sys.executable, "-c", script, *args], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_fingerprint_is_stable_across_processes(self):
+        script = "import lex_core; print(lex_core.LexicalAnalyzer().fingerprint())"
+        self.assertEqual(run_with_hash_seed(1, script), run_with_hash_seed(2, script))
+
+    def test_hit_across_processes(self):
+        script = ("import sys, lex_cache, lex_core\n"
+                  "cache = lex_cache.LexCache(sys.argv[1])\n"
+                  "print(cache.analyze(lex_core.LexicalAnalyzer(), sys.argv[2]))")
+        self.assertEqual(run_with_hash_seed(1, script, self.directory, CODE), "False")
+        self.assertEqual(run_with_hash_seed(2, script, self.directory, CODE), "True")
+
+    def test_hit_across_instances(self):
+        first = LexicalAnalyzer()
+        self.assertFalse(LexCache(self.directory).analyze(first, CODE))
+        second = LexicalAnalyzer()
+        self.assertTrue(LexCache(self.directory).analyze(second, CODE))
+        self.assertEqual(token_rows(second.tokens), token_rows(first.tokens))
+        self.assertEqual(token_rows(second.errors), token_rows(first.errors))
+
+    def test_update_after_hit(self):
+        # A hit must reset the per-line state a multiline run left behind
+        code = "a /* b\nc */ d\ne\n"
+        LexCache(self.directory).analyze(LexicalAnalyzer(), code)
+        analyzer = LexicalAnalyzer()
+        analyzer.analyze(code, multiline_comments=True)
+        self.assertTrue(LexCache(self.directory).analyze(analyzer, code))
+        analyzer.update(0, 1, "g")
+        fresh = LexicalAnalyzer()
+        fresh.analyze("g" + code[1:])
+        self.assertEqual(token_rows(analyzer.tokens), token_rows(fresh.tokens))
+        self.assertEqual(token_rows(analyzer.errors), token_rows(fresh.errors))
+
+    def test_eviction_keeps_directory_under_max_bytes(self):
+        analyzer = LexicalAnalyzer()
+        analyzer.analyze(CODE)
+        entry_size = len(analyzer.tokens.to_bytes()) + len(analyzer.errors.to_bytes()) + 8
+        # Two instances share the directory, as batch workers do
+        caches = [LexCache(self.directory, max_bytes=50 * entry_size) for _ in range(2)]
+        for i in range(400):
+            caches[i % 2].put(f"key{i}", analyzer.tokens, analyzer.errors)
+        on_disk = sum(entry.stat().st_size for entry in os.scandir(self.directory))
+        self.assertLessEqual(on_disk, 50 * entry_size * (1 + 2 * 1 / 16))
+        self.assertGreater(caches[0].evictions + caches[1].evictions, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
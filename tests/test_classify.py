@@ -0,0 +1,41 @@
+import random
+import unittest
+
+from lex_core import LexicalAnalyzer, TokenType
+from tests import PIECES
+
+
+class ClassifyTest(unittest.TestCase):
+    """The batch API must answer exactly like is_token_of_type()"""
+
+    def setUp(self):
+        rng = random.Random(11)
+        self.texts = [''.join(rng.choice(PIECES) for _ in range(rng.randint(0, 3))) for _ in range(3000)]
+        self.texts += list(PIECES)
+
+    def test_is_token_of_type_many(self):
+        analyzer = LexicalAnalyzer()
+        for token_type in list(TokenType) + ["Keyword", None]:
+            self.assertEqual(analyzer.is_token_of_type_many(self.texts, token_type),
+                             [analyzer.is_token_of_type(text, token_type) for text in self.texts], token_type)
+
+    def test_classify_many(self):
+        analyzer = LexicalAnalyzer()
+
+        def first_type(text):
+            return next((token_type for token_type in analyzer.CLASSIFY_ORDER
+                         if analyzer.is_token_of_type(text, token_type)), None)
+
+        # Twice, so the second pass is answered from the memo
+        for _ in range(2):
+            self.assertEqual(analyzer.classify_many(self.texts), list(map(first_type, self.texts)))
+
+    def test_set_keywords_drops_memo(self):
+        analyzer = LexicalAnalyzer()
+        self.assertEqual(analyzer.classify_many(["widget"]), [TokenType.IDENTIFIER])
+        analyzer.set_keywords(keywords={"widget"})
+        self.assertEqual(analyzer.classify_many(["widget", b"widget"]), [TokenType.KEYWORD] * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import time
+import unittest
+
+from lex_bench import generate_corpus
+from lex_core import LexicalAnalyzer, TokenType
+from lex_dfa import DFALexer, DFATables, compile_language, definition_from_analyzer
+from tests import token_rows
+
+
+class DFATest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tables = compile_language(definition_from_analyzer(LexicalAnalyzer()))
+
+    def test_matches_analyzer(self):
+        lexer = DFALexer(self.tables)
+        analyzer = LexicalAnalyzer()
+        # Error recovery differs by design (the DFA groups every character no
+        # rule can start into one run), so compare on error-free input
+        for seed in range(3):
+            code = generate_corpus(20000, seed=seed, error_rate=0)
+            analyzer.analyze(code)
+            expected = sorted(token_rows(analyzer.tokens) + token_rows(analyzer.errors), key=lambda row: row[4])
+            self.assertEqual(token_rows(lexer.tokenize(code)), expected, seed)
+            self.assertEqual(token_rows(lexer.tokenize(code.encode('utf-8'))), expected, seed)
+
+    def test_tables_round_trip(self):
+        tables = DFATables.from_dict(self.tables.to_dict())
+        self.assertEqual((tables.name, tables.categories, tables.bounds),
+                         (self.tables.name, self.tables.categories, self.tables.bounds))
+        self.assertEqual(tables.table, self.tables.table)
+        self.assertEqual(tables.accept, self.tables.accept)
+        code = generate_corpus(5000, seed=4)
+        self.assertEqual(token_rows(DFALexer(tables).tokenize(code)),
+                         token_rows(DFALexer(self.tables).tokenize(code)))
+
+    def test_lines_after_error_runs(self):
+        # Newlines the skip rules do not cover come back as errors but still count
+        lexer = DFALexer({"rules": [["Identifier", "[a-z]+"]], "skip": [" +"]})
+        rows = [(token.type, token.value, token.line_number, token.column)
+                for token in lexer.tokenize("ab\ncd\nef")]
+        self.assertEqual(rows, [(TokenType.IDENTIFIER, "ab", 1, 1), (TokenType.ERROR, "\n", 1, 3),
+                                (TokenType.IDENTIFIER, "cd", 2, 1), (TokenType.ERROR, "\n", 2, 3),
+                                (TokenType.IDENTIFIER, "ef", 3, 1)])
+
+    def test_unterminated_comments_scan_in_linear_time(self):
+        # Each unterminated /* used to re-read the rest of the input
+        lexer = DFALexer(self.tables)
+        seconds = {}
+        for count in (4000, 16000):
+            began = time.perf_counter()
+            self.assertEqual(sum(1 for _ in lexer.scan('/* a\n' * count)), 3 * count)
+            seconds[count] = time.perf_counter() - began
+        # Four times the input; a quadratic scan would take about sixteen times as long
+        self.assertLess(seconds[16000], 8 * seconds[4000] + 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import io
+import re
+import unittest
+
+from lex_core import LexicalAnalyzer, TokenType
+from tests import random_sources, token_rows
+
+
+def reference_analyze(analyzer, code):
+    """The original line-by-line analyzer: strip each line and re.match every pattern on the rest.
+
+    Returns (tokens, errors) as (type, value, line) lists.
+    """
+    tokens = []
+    errors = []
+    symbols = analyzer.operators | analyzer.punctuations | analyzer.special_chars
+    for line_num, line in enumerate(code.split('\n'), 1):
+        line = line.strip()
+        while line:
+            ignore_match = re.match(r'//.*|/\*.*?\*/', line)
+            if ignore_match:
+                line = line[len(ignore_match.group(0)):].lstrip()
+                continue
+            for token_type, pattern in analyzer.patterns:
+                if token_type is None:
+                    continue
+                match = re.match(pattern, line)
+                if match:
+                    value = match.group(0)
+                    tokens.append((token_type, value, line_num))
+                    line = line[len(value):].lstrip()
+                    break
+            else:
+                # Resume at the next known symbol
+                next_pos = len(line)
+                for symbol in symbols:
+                    index = line.find(symbol)
+                    if 0 < index < next_pos:
+                        next_pos = index
+                errors.append((TokenType.ERROR, line[:next_pos], line_num))
+                line = line[next_pos:]
+    return tokens, errors
+
+
+def rows(store):
+    return [(token.type, token.value, token.line_number) for token in store]
+
+
+class EngineTest(unittest.TestCase):
+    """Every engine and classification mode must give the original analyzer's tokens"""
+
+    CONFIGS = [dict(engine=engine, classify=classify)
+               for engine in LexicalAnalyzer.ENGINES for classify in LexicalAnalyzer.CLASSIFY_MODES]
+
+    def setUp(self):
+        self.sources = random_sources(400, seed=3)
+
+    def test_matches_reference(self):
+        reference = LexicalAnalyzer()
+        for config in self.CONFIGS:
+            analyzer = LexicalAnalyzer(**config)
+            for code in self.sources:
+                analyzer.analyze(code)
+                expected_tokens, expected_errors = reference_analyze(reference, code)
+                self.assertEqual(rows(analyzer.tokens), expected_tokens, (config, code))
+                self.assertEqual(rows(analyzer.errors), expected_errors, (config, code))
+
+    def test_custom_keywords(self):
+        # set_keywords() must rebuild the regex patterns and the lookup sets alike
+        reference = LexicalAnalyzer()
+        reference.set_keywords(keywords={'x', 'float', 'goto'}, constants={'y1', 'TRUE'})
+        for config in self.CONFIGS:
+            analyzer = LexicalAnalyzer(**config)
+            analyzer.set_keywords(keywords={'x', 'float', 'goto'}, constants={'y1', 'TRUE'})
+            for code in self.sources[:100]:
+                analyzer.analyze(code)
+                self.assertEqual((rows(analyzer.tokens), rows(analyzer.errors)),
+                                 reference_analyze(reference, code), (config, code))
+
+    def test_recovery_policies_agree_across_engines(self):
+        for recovery in LexicalAnalyzer.RECOVERY_POLICIES:
+            sequential = LexicalAnalyzer(engine="sequential", recovery=recovery)
+            master = LexicalAnalyzer(engine="master", recovery=recovery)
+            for code in self.sources:
+                sequential.analyze(code)
+                master.analyze(code)
+                self.assertEqual(rows(sequential.tokens), rows(master.tokens), (recovery, code))
+                self.assertEqual(rows(sequential.errors), rows(master.errors), (recovery, code))
+
+    def test_recovery_without_symbols(self):
+        for recovery in LexicalAnalyzer.RECOVERY_POLICIES:
+            for engine in LexicalAnalyzer.ENGINES:
+                analyzer = LexicalAnalyzer(engine=engine, recovery=recovery)
+                analyzer.operators, analyzer.punctuations, analyzer.special_chars = set(), set(), set()
+                analyzer._compile_patterns()
+                analyzer.analyze("int x = 1;\n\"ab cd\nfloat y;")
+                self.assertEqual([token.value for token in analyzer.tokens][-3:], ['float', 'y', ';'],
+                                 (engine, recovery))
+                self.assertEqual([token.line_number for token in analyzer.errors], [2], (engine, recovery))
+
+    def test_streaming_matches_analyze(self):
+        analyzer = LexicalAnalyzer()
+        for code in self.sources[:100]:
+            analyzer.analyze(code)
+            expected = sorted(token_rows(analyzer.tokens) + token_rows(analyzer.errors),
+                              key=lambda row: row[4])
+            streamed = analyzer.iter_tokens(io.StringIO(code), chunk_size=7, multiline_comments=False)
+            self.assertEqual(token_rows(streamed), expected, code)
+
+    def test_streaming_decode_errors(self):
+        analyzer = LexicalAnalyzer()
+        data = b"int x;\n\xff\xfe junk\n"
+        with self.assertRaises(UnicodeDecodeError):
+            list(analyzer.iter_tokens(io.BytesIO(data)))
+        values = [token.value for token in analyzer.iter_tokens(io.BytesIO(data), errors="replace")]
+        self.assertEqual(values, ["int", "x", ";", "\ufffd\ufffd junk"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from lex_bench import generate_corpus
+from lex_core import LexicalAnalyzer
+from lex_index import LexIndex
+
+
+def snapshot(index):
+    """Every term in use with its sorted (path, line, column) postings"""
+    return {value: sorted(index.lookup(value)) for value in index.term_ids if index.lookup(value)}
+
+
+class IndexTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.src = os.path.join(self.root, "src")
+        os.mkdir(self.src)
+        self.path = os.path.join(self.root, "test.lexidx")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, code, stamp):
+        path = os.path.join(self.src, name)
+        with open(path, 'w') as f:
+            f.write(code)
+        # Distinct mtimes, so every rewrite is seen as a change
+        os.utime(path, ns=(stamp, stamp))
+        return path
+
+    def test_lookup(self):
+        path = self.write("a.c", "int main() {\n  return buf_size + NULL;\n}\n", 10 ** 9)
+        index = LexIndex()
+        index.update([self.src])
+        self.assertEqual(index.lookup("buf_size"), [(path, 2, 10)])
+        self.assertEqual(index.lookup("return"), [(path, 2, 3)])
+        self.assertEqual(index.lookup("NULL"), [(path, 2, 21)])
+        self.assertEqual(index.lookup("+"), [])
+        self.assertEqual(index.files_using("main"), [path])
+        self.assertEqual(index.prefix("buf"), ["buf_size"])
+
+    def test_updates_match_a_fresh_index(self):
+        # Random rewrites and deletions, saved and reloaded each round: the
+        # incremental index must equal one built from scratch
+        rng = random.Random(7)
+        for step in range(25):
+            for _ in range(rng.randint(1, 5)):
+                name = f"f{rng.randrange(12)}.c"
+                if os.path.exists(os.path.join(self.src, name)) and rng.random() < 0.3:
+                    os.remove(os.path.join(self.src, name))
+                else:
+                    code = generate_corpus(rng.randint(50, 300), seed=rng.randrange(10 ** 6))
+                    self.write(name, code, (step + 1) * 10 ** 9)
+            index = LexIndex.load(self.path) if os.path.exists(self.path) else LexIndex()
+            index.update([self.src])
+            index.save(self.path)
+
+            fresh = LexIndex()
+            fresh.update([self.src])
+            loaded = LexIndex.load(self.path)
+            self.assertEqual(snapshot(index), snapshot(fresh), step)
+            self.assertEqual(snapshot(loaded), snapshot(fresh), step)
+            self.assertEqual(index.prefix("", 10 ** 6), fresh.prefix("", 10 ** 6), step)
+            # Compaction keeps dead file ids to at most a quarter of the table
+            self.assertLessEqual(len(loaded.files) - len(loaded), 0.25 * len(loaded.files), step)
+
+    def test_compact(self):
+        index = LexIndex()
+        analyzer = LexicalAnalyzer()
+        for version in range(4):
+            for name in ("a.c", "b.c"):
+                analyzer.analyze(f"int {name[0]}_{version} = shared;\n")
+                index.add_store(name, analyzer.tokens)
+        before = snapshot(index)
+        index.compact()
+        self.assertEqual(index.files, ["a.c", "b.c"])
+        self.assertEqual(sorted(index.terms), ["a_3", "b_3", "int", "shared"])
+        self.assertEqual(snapshot(index), before)
+        index.remove_file("a.c")
+        self.assertEqual(index.lookup("shared"), [("b.c", 1, 11)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import random
+import re
+import unittest
+
+from lex_core import LexicalAnalyzer, TokenType
+from tests import random_source, random_sources, token_rows
+
+
+class UpdateTest(unittest.TestCase):
+    """update() after random edits must match analyze() of the edited source"""
+
+    def check_edits(self, multiline_comments, engine="sequential", seed=0):
+        rng = random.Random(seed)
+        for code in random_sources(150, seed):
+            analyzer = LexicalAnalyzer(engine=engine)
+            analyzer.analyze(code, multiline_comments=multiline_comments)
+            for _ in range(6):
+                source = analyzer.tokens.source
+                start = rng.randint(0, len(source))
+                end = rng.randint(start, min(len(source), start + rng.randint(0, 15)))
+                new_text = random_source(rng, 4)
+                analyzer.update(start, end, new_text)
+                edited = source[:start] + new_text + source[end:]
+
+                fresh = LexicalAnalyzer(engine=engine)
+                fresh.analyze(edited, multiline_comments=multiline_comments)
+                context = (source, start, end, new_text)
+                self.assertEqual(analyzer.tokens.source, edited, context)
+                self.assertEqual(token_rows(analyzer.tokens), token_rows(fresh.tokens), context)
+                self.assertEqual(token_rows(analyzer.errors), token_rows(fresh.errors), context)
+                # The per-type index is spliced separately from the columns
+                for token_type in TokenType:
+                    self.assertEqual(token_rows(analyzer.get_tokens_by_type(token_type)),
+                                     token_rows(fresh.get_tokens_by_type(token_type)), context)
+                line_starts = [0] + [match.end() for match in re.finditer('\n', edited)]
+                self.assertEqual(list(analyzer._line_index()), line_starts, context)
+
+    def test_single_line_comments(self):
+        self.check_edits(multiline_comments=False)
+
+    def test_multiline_comments(self):
+        self.check_edits(multiline_comments=True, seed=1)
+
+    def test_master_engine(self):
+        self.check_edits(multiline_comments=True, engine="master", seed=2)
+
+    def test_line_range_views_after_update(self):
+        analyzer = LexicalAnalyzer()
+        analyzer.analyze("int a;\nint b;\nint c;\n")
+        analyzer.update(7, 13, "float x = 1;\n\nfloat y;")
+        self.assertEqual([token.value for token in analyzer.tokens.in_lines(2, 4)],
+                         ['float', 'x', '=', '1', ';', 'float', 'y', ';'])
+        self.assertEqual([token.line_number for token in analyzer.tokens.in_lines(5, 5)], [5, 5, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()